@@ -0,0 +1,93 @@
+"""Compare response serialization before and after the msgspec JSON provider.
+
+Run from the repository root:
+
+    python benchmarks/bench_json.py --projects 500 --repeat 20
+
+"before" is the old path: walk the documents with convert_objectid_to_str
+and then encode them with the stdlib json module using the settings of
+Flask's DefaultJSONProvider (sorted keys, ASCII-escaped). "after" is a
+single msgspec encode of the raw documents.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from src.json_provider import encoder  # noqa: E402
+
+
+def convert_objectid_to_str(data):
+    if isinstance(data, list):
+        return [convert_objectid_to_str(item) for item in data]
+    elif isinstance(data, dict):
+        return {key: convert_objectid_to_str(value) for key, value in data.items()}
+    elif isinstance(data, ObjectId):
+        return str(data)
+    else:
+        return data
+
+
+def _default(obj):
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError(type(obj).__name__)
+
+
+def make_projects(count, comments_per_project):
+    now = datetime.datetime.utcnow()
+    projects = []
+    for index in range(count):
+        projects.append({
+            "_id": ObjectId(),
+            "projectName": f"Project {index}",
+            "projectDescription": "A project description that is a few sentences long. " * 4,
+            "createdBy": f"user{index % 50}",
+            "upvotes": [ObjectId() for _ in range(10)],
+            "tags": ["machine learning", "robotics", "biotech"],
+            "layers": [{"index": layer, "content": "Layer content. " * 10} for layer in range(4)],
+            "links": ["https://example.com"],
+            "created_at": now,
+            "comments": [{
+                "_id": ObjectId(),
+                "author_id": ObjectId(),
+                "author": "someone",
+                "text": "Nice work!",
+                "project_target": ObjectId(),
+                "upvotes": [],
+            } for _ in range(comments_per_project)],
+        })
+    return projects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=500)
+    parser.add_argument('--comments', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    projects = make_projects(args.projects, args.comments)
+
+    def before():
+        return json.dumps(convert_objectid_to_str(projects), default=_default, ensure_ascii=True, sort_keys=True)
+
+    def after():
+        return encoder.encode(projects)
+
+    before_s = min(timeit.repeat(before, number=1, repeat=args.repeat))
+    after_s = min(timeit.repeat(after, number=1, repeat=args.repeat))
+    size_kb = len(after()) / 1024
+    print(f"{args.projects} projects, {size_kb:.0f} KB per response")
+    print(f"convert_objectid_to_str + json: {before_s * 1000:8.2f} ms")
+    print(f"msgspec provider:               {after_s * 1000:8.2f} ms")
+    print(f"speedup:                        {before_s / after_s:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
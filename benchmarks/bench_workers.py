@@ -0,0 +1,123 @@
+"""Compare gunicorn worker classes on an I/O-bound route.
+
+Run from the repository root:
+
+    python benchmarks/bench_workers.py --workers 2 --concurrency 32 --latency 0.05
+
+Each worker class in turn is started with the repository's gunicorn.conf.py
+and serves a small app whose /io route waits ``--latency`` seconds without
+using the CPU, the way a request spends its time waiting on Mongo or OpenAI.
+``--concurrency`` client threads then call it for ``--duration`` seconds and
+the requests per second are reported. The sync worker can only have one
+request in flight per process, so its throughput tops out at about
+workers / latency. gthread raises that cap by a factor of --threads.
+gevent is included when it is installed.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from flask import Flask
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+app = Flask(__name__)
+
+
+@app.route('/io')
+def io_bound():
+    time.sleep(float(os.getenv('BENCH_IO_LATENCY', '0.05')))
+    return 'ok'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not start serving {url}")
+
+
+def load(url, concurrency, duration):
+    done = [0] * concurrency
+    stop = time.monotonic() + duration
+
+    def client(slot):
+        while time.monotonic() < stop:
+            urllib.request.urlopen(url, timeout=30).read()
+            done[slot] += 1
+
+    clients = [threading.Thread(target=client, args=(slot,)) for slot in range(concurrency)]
+    start = time.monotonic()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return sum(done) / (time.monotonic() - start)
+
+
+def run(worker_class, args):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(args.workers),
+        # gunicorn silently swaps sync for gthread when threads > 1.
+        GUNICORN_THREADS=str(1 if worker_class == 'sync' else args.threads),
+        GUNICORN_ACCESS_LOG='',
+        BENCH_IO_LATENCY=str(args.latency),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.bench_workers:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f'http://127.0.0.1:{port}/io'
+        wait_until_up(url)
+        return load(url, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds each request waits on I/O')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    worker_classes = ['sync', 'gthread']
+    try:
+        import gevent  # noqa: F401
+        worker_classes.append('gevent')
+    except ImportError:
+        print('gevent not installed; skipping it')
+
+    results = {}
+    for worker_class in worker_classes:
+        results[worker_class] = run(worker_class, args)
+        print(f'{worker_class:8s} {results[worker_class]:8.1f} req/s')
+    for worker_class in worker_classes[1:]:
+        print(f'{worker_class} vs sync: {results[worker_class] / results["sync"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
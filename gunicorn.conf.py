@@ -0,0 +1,39 @@
+"""Gunicorn settings for the web process (loaded by the Procfile).
+
+Every value can be overridden from the environment; see "Running in
+production" in the README for how the worker and pool sizes fit together.
+"""
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# gthread (default) serves several requests per process on threads, so a
+# request waiting on Mongo or OpenAI no longer holds a whole worker.
+# gevent does the same with greenlets; it needs `pip install gevent`.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# Heroku sets WEB_CONCURRENCY from the dyno size.
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+
+# Import the app once in the master and fork it, so workers share its pages
+# and start quickly. post_fork below gives each worker its own MongoClient.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+
+if worker_class == 'gevent':
+    # Patch before the preloaded app imports pymongo, socket and threading.
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def post_fork(server, worker):
+    app_module = sys.modules.get('src.app')
+    if app_module is not None:
+        from src import reset_mongo_client
+        reset_mongo_client(app_module.app)
@@ -4,27 +4,87 @@ import os
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
-from flask_pymongo import PyMongo
+from flask_pymongo import PyMongo, BSONObjectIdConverter
 from flask_jwt_extended import JWTManager
-from flask_session import Session
 from datetime import timedelta
 import certifi
+from .json_provider import MsgspecJSONProvider
+from .sessions import LazySessionInterface, MemorySessionStore
 import ssl
+import tempfile
+import threading
 
 load_dotenv()
 
 
-mongo = PyMongo()
+class LazyPyMongo(PyMongo):
+    """PyMongo that builds its MongoClient on first use of ``cx`` or ``db``.
+
+    Parsing a mongodb+srv:// URI does SRV and TXT lookups, so building the
+    client in create_app would put DNS traffic on every import and every
+    worker fork.
+    """
+
+    _client_lock = threading.Lock()
+
+    def init_app(self, app, uri=None, *args, **kwargs):
+        uri = uri or app.config.get("MONGO_URI")
+        if uri is None:
+            raise ValueError("You must specify a URI or set the MONGO_URI Flask config variable")
+        kwargs.setdefault("connect", False)
+        with self._client_lock:
+            self.__dict__.pop("cx", None)
+            self.__dict__.pop("db", None)
+            self._client_args = (uri, *args)
+            self._client_kwargs = kwargs
+        app.url_map.converters["ObjectId"] = BSONObjectIdConverter
+
+    def __getattr__(self, name):
+        # Only reached while cx/db have not been built since the last init_app.
+        if name not in ("cx", "db") or "_client_args" not in self.__dict__:
+            raise AttributeError(name)
+        from pymongo import MongoClient
+        from pymongo.errors import ConfigurationError
+        with self._client_lock:
+            if "cx" not in self.__dict__:
+                self.__dict__["cx"] = MongoClient(*self._client_args, **self._client_kwargs)
+            if "db" not in self.__dict__:
+                try:
+                    self.__dict__["db"] = self.__dict__["cx"].get_default_database()
+                except ConfigurationError:
+                    # No database in the URI, as with Flask-PyMongo.
+                    self.__dict__["db"] = None
+            return self.__dict__[name]
+
+
+mongo = LazyPyMongo()
 jwt = JWTManager()
-sess = Session()
 
 #seeing if commit works
 
+def mongo_client_options(app):
+    # connect=False: no sockets or monitor threads until first use, so a
+    # client built before gunicorn forks is never shared by two processes.
+    # tz_aware: datetimes come back as UTC-aware and serialize with a "Z".
+    return {
+        "connect": False,
+        "tz_aware": True,
+        "maxPoolSize": app.config['MONGO_MAX_POOL_SIZE'],
+        "waitQueueTimeoutMS": app.config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+    }
+
+
+def reset_mongo_client(app):
+    """Give this process a fresh MongoClient, built on first use; gunicorn calls it after fork."""
+    mongo.init_app(app, **mongo_client_options(app))
+
+
 def create_app():
     app = Flask(__name__)
+    app.json = MsgspecJSONProvider(app)
     #CORS(app, supports_credentials=True, resources={r"/*": {"origins": "https://silomvp-040bbdc854fa.herokuapp.com"}})
     #CORS(app)
-    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, expose_headers=["Authorization"])
+    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, expose_headers=["Authorization", "X-Total-Count"])
 
 
     app.config['SECRET_KEY'] = 'your_secret_key'
@@ -32,7 +92,43 @@ def create_app():
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
     app.config['MONGO_URI'] = os.getenv('MONGO_URI')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=1)
-    app.config['SESSION_TYPE'] = 'filesystem'
+    app.config['SESSION_MAX_ENTRIES'] = int(os.getenv('SESSION_MAX_ENTRIES', 10000))
+    app.config['SESSION_PURGE_SECONDS'] = int(os.getenv('SESSION_PURGE_SECONDS', 60))
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    app.config['PASSWORD_HASH_QUEUE_DEPTH'] = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 16))
+    app.config['PASSWORD_HASH_TIMEOUT_SECONDS'] = float(os.getenv('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+    app.config['FEED_PAGE_SIZE'] = int(os.getenv('FEED_PAGE_SIZE', 20))
+    app.config['FEED_MAX_PAGE_SIZE'] = int(os.getenv('FEED_MAX_PAGE_SIZE', 100))
+    app.config['SUGGEST_REFRESH_SECONDS'] = int(os.getenv('SUGGEST_REFRESH_SECONDS', 300))
+    app.config['DIRECTORY_SNAPSHOT_PATH'] = os.getenv('DIRECTORY_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'silo_directory.snapshot'))
+    app.config['DIRECTORY_SNAPSHOT_MAX_AGE'] = int(os.getenv('DIRECTORY_SNAPSHOT_MAX_AGE', 3600))
+    app.config['DIRECTORY_REFRESH_SECONDS'] = float(os.getenv('DIRECTORY_REFRESH_SECONDS', 60))
+    app.config['DIRECTORY_DELTA_MAX_BYTES'] = int(os.getenv('DIRECTORY_DELTA_MAX_BYTES', 1024 * 1024))
+    app.config['LLM_CACHE_TTL_SECONDS'] = int(os.getenv('LLM_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+    app.config['LLM_CACHE_MAX_ENTRIES'] = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000))
+    app.config['LLM_POOL_SIZE'] = int(os.getenv('LLM_POOL_SIZE', 8))
+    app.config['LLM_TIMEOUT_SECONDS'] = float(os.getenv('LLM_TIMEOUT_SECONDS', 30))
+    app.config['LLM_CHUNK_TOKENS'] = int(os.getenv('LLM_CHUNK_TOKENS', 2500))
+    app.config['LLM_MAX_CHUNKS'] = int(os.getenv('LLM_MAX_CHUNKS', 8))
+    app.config['LLM_BACKEND'] = os.getenv('LLM_BACKEND', 'openai')
+    app.config['LLM_FAKE_LATENCY_SECONDS'] = float(os.getenv('LLM_FAKE_LATENCY_SECONDS', 0))
+    app.config['LLM_FAKE_FAILURE_RATE'] = float(os.getenv('LLM_FAKE_FAILURE_RATE', 0))
+    app.config['LLM_MAX_CONCURRENCY'] = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+    app.config['LLM_QUEUE_TIMEOUT_SECONDS'] = float(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', 10))
+    app.config['LLM_RATE_PER_SECOND'] = float(os.getenv('LLM_RATE_PER_SECOND', 5))
+    app.config['LLM_RATE_BURST'] = int(os.getenv('LLM_RATE_BURST', 10))
+    app.config['LLM_MAX_RETRIES'] = int(os.getenv('LLM_MAX_RETRIES', 3))
+    app.config['LLM_BACKOFF_BASE_SECONDS'] = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', 0.5))
+    app.config['LLM_BACKOFF_MAX_SECONDS'] = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', 8))
+    app.config['LLM_BREAKER_FAILURES'] = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+    app.config['LLM_BREAKER_RESET_SECONDS'] = float(os.getenv('LLM_BREAKER_RESET_SECONDS', 30))
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+    app.config['JOB_WORKERS_IN_WEB'] = int(os.getenv('JOB_WORKERS_IN_WEB', 0))
+    app.config['JOB_LEASE_SECONDS'] = int(os.getenv('JOB_LEASE_SECONDS', 300))
+    app.config['JOB_RESULT_TTL_SECONDS'] = int(os.getenv('JOB_RESULT_TTL_SECONDS', 24 * 3600))
+    app.config['MONGO_MAX_POOL_SIZE'] = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+    app.config['MONGO_WAIT_QUEUE_TIMEOUT_MS'] = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000))
 
     #@app.after_request
     #def after_request(response):
@@ -41,13 +137,18 @@ def create_app():
     #    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
     #    return response
 
-    mongo.init_app(app)
+    mongo.init_app(app, **mongo_client_options(app))
     jwt.init_app(app)
-    sess.init_app(app)
+    app.session_interface = LazySessionInterface(
+        MemorySessionStore(app.config['SESSION_MAX_ENTRIES'], app.config['SESSION_PURGE_SECONDS'])
+    )
 
     from .routes import main_bp
     app.register_blueprint(main_bp)
 
+    from .commands import register_commands
+    register_commands(app)
+
     return app
 
 
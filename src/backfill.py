@@ -0,0 +1,140 @@
+import datetime
+import json
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app as app
+from pymongo import UpdateOne
+from .summarize import summarize_text_description_title_tags
+
+CHECKPOINT_ID = "backfill_tags"
+BACKFILL_BATCH_SIZE = 50
+BACKFILL_CONCURRENCY = 4
+
+MISSING_TAGS = {"$or": [{"tags": {"$exists": False}}, {"tags": None}, {"tags": []}]}
+MISSING_DESCRIPTION = {"$or": [{"projectDescription": {"$exists": False}}, {"projectDescription": None}, {"projectDescription": ""}]}
+BACKFILL_PROJECTION = {"projectName": 1, "projectDescription": 1, "tags": 1, "layers": 1}
+
+
+def project_source_text(project):
+    """The text we can summarize a project from: its name, description and layers."""
+    parts = [project.get("projectName") or "", project.get("projectDescription") or ""]
+    for layer in project.get("layers") or []:
+        parts.append(layer.get("content", "") if isinstance(layer, dict) else str(layer))
+    return "\n\n".join(part for part in parts if part)
+
+
+def parse_tags_response(content):
+    """Pull (tags, description) out of a DESCRIPTION_TITLE_TAGS_PROMPT response."""
+    data = json.loads(content)
+    tags = []
+    for tag in data.get("tags") or []:
+        tag = str(tag).strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags, (data.get("description") or "").strip()
+
+
+def backfill_updates(project, content):
+    """Build the UpdateOnes filling whatever ``project`` is missing.
+
+    Each field is guarded by its own "still empty" filter, so a project
+    edited while its summary was being generated keeps the edit.
+    """
+    tags, description = parse_tags_response(content)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    updates = []
+    if tags and not project.get("tags"):
+        updates.append(UpdateOne({"_id": project["_id"], **MISSING_TAGS}, {"$set": {"tags": tags, "updated_at": now}}))
+    if description and not project.get("projectDescription"):
+        updates.append(UpdateOne({"_id": project["_id"], **MISSING_DESCRIPTION}, {"$set": {"projectDescription": description, "updated_at": now}}))
+    return updates
+
+
+def _summarize(flask_app, text):
+    with flask_app.app_context():
+        return summarize_text_description_title_tags(text)
+
+
+def load_checkpoint(db):
+    return db.backfill_checkpoints.find_one({"_id": CHECKPOINT_ID}) or {}
+
+
+def save_checkpoint(db, last_id, counts):
+    db.backfill_checkpoints.update_one(
+        {"_id": CHECKPOINT_ID},
+        {"$set": {"last_id": last_id, "updated_at": datetime.datetime.now(datetime.timezone.utc)}, "$inc": counts},
+        upsert=True,
+    )
+
+
+def iter_batches(cursor, batch_size):
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def backfill_tags(db, batch_size=BACKFILL_BATCH_SIZE, concurrency=BACKFILL_CONCURRENCY, limit=None, dry_run=False, echo=print):
+    """Fill in tags and projectDescription for projects missing either.
+
+    Projects are read in _id order after the last checkpoint, summarized
+    ``concurrency`` at a time (through the LLM cache and client, so repeat
+    runs and rate limits are handled there), and written back with one
+    bulk_write per batch. The checkpoint advances after each batch, so an
+    interrupted run resumes where it stopped. Projects that fail are
+    skipped and left for a --restart run.
+    """
+    checkpoint = load_checkpoint(db)
+    query = {"$or": [MISSING_TAGS, MISSING_DESCRIPTION]}
+    if checkpoint.get("last_id") is not None:
+        query = {"$and": [query, {"_id": {"$gt": checkpoint["last_id"]}}]}
+        echo(f"Resuming after {checkpoint['last_id']}")
+    cursor = db.projects.find(query, BACKFILL_PROJECTION, no_cursor_timeout=True).sort("_id", 1).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    totals = {"scanned": 0, "updated": 0, "skipped": 0, "failed": 0}
+    flask_app = app._get_current_object()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='backfill') as pool:
+            for batch in iter_batches(cursor, batch_size):
+                counts = {"scanned": len(batch), "updated": 0, "skipped": 0, "failed": 0}
+                texts = {project["_id"]: project_source_text(project) for project in batch}
+                futures = {
+                    project_id: pool.submit(_summarize, flask_app, text)
+                    for project_id, text in texts.items() if text
+                }
+                updates = []
+                for project in batch:
+                    future = futures.get(project["_id"])
+                    if future is None:
+                        counts["skipped"] += 1
+                        continue
+                    try:
+                        project_updates = backfill_updates(project, future.result())
+                    except Exception as e:
+                        echo(f"Failed to backfill project {project['_id']}: {e}")
+                        counts["failed"] += 1
+                        continue
+                    if project_updates:
+                        updates.extend(project_updates)
+                        counts["updated"] += 1
+                    else:
+                        counts["skipped"] += 1
+                if not dry_run:
+                    if updates:
+                        db.projects.bulk_write(updates, ordered=False)
+                    save_checkpoint(db, batch[-1]["_id"], counts)
+                for field, value in counts.items():
+                    totals[field] += value
+                echo(f"Batch through {batch[-1]['_id']}: {counts['updated']} updated, {counts['skipped']} skipped, {counts['failed']} failed")
+    finally:
+        cursor.close()
+    return totals
+
+
+def reset_checkpoint(db):
+    db.backfill_checkpoints.delete_one({"_id": CHECKPOINT_ID})
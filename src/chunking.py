@@ -0,0 +1,50 @@
+import re
+
+# English prose averages about four characters per token for OpenAI's
+# tokenizers; close enough for budgeting without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _pieces(text, max_chars):
+    """Split ``text`` into pieces of at most ``max_chars``, preferring paragraph, then sentence, boundaries."""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            yield paragraph
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                yield sentence[:cut]
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                yield sentence
+
+
+def split_text(text, max_tokens):
+    """Pack ``text`` into chunks of at most ``max_tokens`` (estimated), in order.
+
+    Chunks break on paragraph boundaries where possible, then on sentence
+    boundaries, and only split inside a sentence when it alone is over budget.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks, current, size = [], [], 0
+    for piece in _pieces(text or "", max_chars):
+        if current and size + len(piece) + 2 > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -0,0 +1,97 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from . import mongo
+from .indexes import ensure_indexes
+from .upvotes import recount_upvotes, dedupe_upvotes
+from .ranking import rank_all_projects
+from .feed import migrate_created_at
+from .jobs import worker_loop, start_job_workers
+from .backfill import backfill_tags, reset_checkpoint, BACKFILL_BATCH_SIZE, BACKFILL_CONCURRENCY
+
+
+@click.command('create-indexes')
+@with_appcontext
+def create_indexes_command():
+    """Create the MongoDB indexes the API relies on."""
+    ensure_indexes(mongo.db)
+    click.echo('Indexes created.')
+
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Bring existing data up to date, then create indexes.
+
+    Runs in the Procfile release step; every step is safe to repeat.
+    """
+    migrated = migrate_created_at(mongo.db)
+    click.echo(f'{migrated} projects given a date created_at.')
+    removed = dedupe_upvotes(mongo.db)
+    click.echo(f'{removed} duplicate upvotes removed.')
+    recount_upvotes(mongo.db, only_missing=True)
+    click.echo('Missing upvote counts filled in.')
+    ranked = rank_all_projects(mongo.db, only_missing=True)
+    click.echo(f'{ranked} projects given a hot score.')
+    ensure_indexes(mongo.db)
+    click.echo('Indexes created.')
+
+
+@click.command('recount-upvotes')
+@with_appcontext
+def recount_upvotes_command():
+    """Backfill upvote_count on projects and users from their upvotes arrays."""
+    recount_upvotes(mongo.db)
+    click.echo('Upvote counts rebuilt.')
+
+
+@click.command('rank-projects')
+@with_appcontext
+def rank_projects_command():
+    """Recompute hot_score for every project."""
+    rank_all_projects(mongo.db)
+    click.echo('Project hot scores rebuilt.')
+
+
+@click.command('migrate-created-at')
+@with_appcontext
+def migrate_created_at_command():
+    """Convert string or missing project created_at values to dates."""
+    count = migrate_created_at(mongo.db)
+    click.echo(f'{count} projects migrated.')
+
+
+@click.command('run-job-worker')
+@with_appcontext
+def run_job_worker_command():
+    """Process queued parse jobs with JOB_WORKERS threads until interrupted."""
+    flask_app = current_app._get_current_object()
+    count = max(flask_app.config['JOB_WORKERS'], 1)
+    click.echo(f'Job worker started with {count} threads.')
+    start_job_workers(flask_app, count - 1)
+    worker_loop(flask_app)
+
+
+@click.command('backfill-tags')
+@click.option('--batch-size', default=BACKFILL_BATCH_SIZE, show_default=True, help='Projects per bulk write and checkpoint.')
+@click.option('--concurrency', default=BACKFILL_CONCURRENCY, show_default=True, help='Summaries generated at once.')
+@click.option('--limit', type=int, default=None, help='Stop after this many projects.')
+@click.option('--restart', is_flag=True, help='Ignore the saved checkpoint and start from the first project.')
+@click.option('--dry-run', is_flag=True, help='Generate summaries but write nothing.')
+@with_appcontext
+def backfill_tags_command(batch_size, concurrency, limit, restart, dry_run):
+    """Fill in missing tags and descriptions on existing projects."""
+    if restart:
+        reset_checkpoint(mongo.db)
+    totals = backfill_tags(mongo.db, batch_size=batch_size, concurrency=concurrency, limit=limit, dry_run=dry_run, echo=click.echo)
+    click.echo(f"Backfill done: {totals['scanned']} scanned, {totals['updated']} updated, {totals['skipped']} skipped, {totals['failed']} failed.")
+
+
+def register_commands(app):
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(create_indexes_command)
+    app.cli.add_command(recount_upvotes_command)
+    app.cli.add_command(rank_projects_command)
+    app.cli.add_command(migrate_created_at_command)
+    app.cli.add_command(run_job_worker_command)
+    app.cli.add_command(backfill_tags_command)
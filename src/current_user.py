@@ -0,0 +1,44 @@
+from bson import ObjectId
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from . import mongo
+
+# Fields the access token carries as additional claims (see
+# get_user_context_details) that stay valid for the token's lifetime.
+CLAIM_FIELDS = {'_id', 'username'}
+
+
+def get_current_user(fields=None, verify=True):
+    """Return the authenticated user's document, or None if it does not exist.
+
+    ``fields`` limits the Mongo projection; leave it out for the whole
+    document. Requests that only need ``_id``/``username`` build the user
+    from the JWT claims and only check that the account still exists, with
+    an _id-only lookup the _id index answers without reading the document.
+    Read-only routes that can tolerate a deleted account for the token's
+    lifetime pass ``verify=False`` to skip even that. Anything fetched is
+    cached on ``flask.g`` so later calls in the same request reuse it.
+    """
+    fields = set(fields) if fields else None
+    if fields is not None and fields <= CLAIM_FIELDS:
+        claims = get_jwt()
+        if claims.get('_id'):
+            user = {'_id': ObjectId(claims['_id']), 'username': get_jwt_identity()}
+            if not verify:
+                return user
+            if 'current_user_exists' not in g:
+                g.current_user_exists = mongo.db.users.find_one({"_id": user['_id']}, {"_id": 1}) is not None
+            return user if g.current_user_exists else None
+
+    if 'current_user' in g:
+        cached_fields = g.current_user_fields
+        if g.current_user is None or cached_fields is None or (fields is not None and fields <= cached_fields):
+            return g.current_user
+        if fields is not None:
+            fields |= cached_fields
+
+    projection = {field: 1 for field in fields} if fields is not None else None
+    g.current_user = mongo.db.users.find_one({"username": get_jwt_identity()}, projection)
+    g.current_user_fields = fields | {'_id'} if fields is not None else None
+    return g.current_user
+
@@ -0,0 +1,375 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from bson import ObjectId
+from flask import current_app as app
+from . import mongo
+from .json_provider import encoder
+from .routes_schema_utility import get_user_details
+
+# File layout (little endian):
+#   header   MAGIC, entry count, build time (unix seconds)
+#   ids      count * 12-byte ObjectIds, ascending
+#   offsets  (count + 1) * uint64 into the data section
+#   data     each entry's pre-encoded JSON object followed by b','
+# Because every entry carries its trailing comma, any run of entries
+# [start, stop) is served as data[offsets[start]:offsets[stop] - 1].
+MAGIC = b'SILODIR1'
+HEADER = struct.Struct('<8sII')
+OFFSET = struct.Struct('<Q')
+ID_SIZE = 12
+CHUNK_SIZE = 64 * 1024
+
+# Entries written since the snapshot was built go to an append-only delta
+# file next to it ("<path>.delta"), one record per changed user:
+#   12-byte ObjectId, uint32 length (DELETED for a removed user), entry JSON
+# Readers apply the delta over the snapshot; later records win.
+DELTA_RECORD = struct.Struct('<12sI')
+DELETED = 0xFFFFFFFF
+
+DIRECTORY_PAGE_SIZE = 50
+DIRECTORY_MAX_PAGE_SIZE = 200
+
+DIRECTORY_PROJECTION = {"password": 0}
+
+
+class DirectorySnapshot:
+    """Read-only view of a snapshot file through a shared memory map.
+
+    Every gunicorn worker maps the same file, so the encoded directory sits
+    in the page cache once no matter how many workers serve it.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        magic, self.count, self.built_at = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a directory snapshot")
+        self._ids_at = HEADER.size
+        self._offsets_at = self._ids_at + self.count * ID_SIZE
+        self._data_at = self._offsets_at + (self.count + 1) * OFFSET.size
+
+    def _offset(self, index):
+        return self._data_at + OFFSET.unpack_from(self.mm, self._offsets_at + index * OFFSET.size)[0]
+
+    def _id(self, index):
+        id_at = self._ids_at + index * ID_SIZE
+        return self.mm[id_at:id_at + ID_SIZE]
+
+    def find(self, entry_id):
+        """Return (index, present) for ``entry_id`` (id bytes), by binary search over the ids."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id(middle) < entry_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low, low < self.count and self._id(low) == entry_id
+
+    def iter_range(self, start, stop):
+        """Yield the comma-separated entries [start, stop) in chunks, straight from the map."""
+        if start < stop:
+            begin, end = self._offset(start), self._offset(stop) - 1
+            for chunk_start in range(begin, end, CHUNK_SIZE):
+                yield self.mm[chunk_start:min(chunk_start + CHUNK_SIZE, end)]
+
+
+class DeltaLog:
+    """Reader for one delta file that only parses what was appended since its last read."""
+
+    def __init__(self, path):
+        self.path = path
+        self.inode = None
+        self.position = 0
+        self.entries = {}   # id bytes -> encoded entry, or None when the user was deleted
+
+    def update(self):
+        """Pick up new records; return True if the entries changed."""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            changed = self.inode is not None
+            self.inode, self.position, self.entries = None, 0, {}
+            return changed
+        with f:
+            stat = os.fstat(f.fileno())
+            changed = False
+            if stat.st_ino != self.inode or stat.st_size < self.position:
+                # A new file (the old one was folded into a rebuilt snapshot).
+                self.inode, self.position, self.entries = stat.st_ino, 0, {}
+                changed = True
+            if stat.st_size > self.position:
+                f.seek(self.position)
+                data = f.read(stat.st_size - self.position)
+                consumed = 0
+                while consumed + DELTA_RECORD.size <= len(data):
+                    entry_id, length = DELTA_RECORD.unpack_from(data, consumed)
+                    begin = consumed + DELTA_RECORD.size
+                    end = begin + (0 if length == DELETED else length)
+                    if end > len(data):
+                        break  # a record still being written
+                    self.entries[entry_id] = None if length == DELETED else data[begin:end]
+                    consumed = end
+                if consumed:
+                    self.position += consumed
+                    changed = True
+        return changed
+
+
+class DirectoryView:
+    """The snapshot with delta entries applied, in _id order."""
+
+    def __init__(self, snapshot, overlay):
+        self.snapshot = snapshot
+        # Runs of snapshot entries as (start, stop), delta entries as bytes.
+        self.parts = []
+        position = 0
+        for entry_id in sorted(overlay):
+            index, present = snapshot.find(entry_id)
+            if index > position:
+                self.parts.append((position, index))
+            if overlay[entry_id] is not None:
+                self.parts.append(overlay[entry_id])
+            position = index + 1 if present else index
+        if position < snapshot.count:
+            self.parts.append((position, snapshot.count))
+        self.count = sum(part[1] - part[0] if isinstance(part, tuple) else 1 for part in self.parts)
+
+    def iter_json(self, start=0, stop=None):
+        """Yield the JSON array of entries [start, stop) in chunks."""
+        stop = self.count if stop is None else min(stop, self.count)
+        start = min(start, stop)
+        yield b'['
+        position = 0
+        first = True
+        for part in self.parts:
+            if position >= stop:
+                break
+            length = part[1] - part[0] if isinstance(part, tuple) else 1
+            low, high = max(start, position), min(stop, position + length)
+            if low < high:
+                if not first:
+                    yield b','
+                first = False
+                if isinstance(part, tuple):
+                    yield from self.snapshot.iter_range(part[0] + low - position, part[0] + high - position)
+                else:
+                    yield part
+            position += length
+        yield b']'
+
+
+def encode_entry(user):
+    return encoder.encode(get_user_details(user))
+
+
+def write_snapshot(path, entries, built_at):
+    """Atomically replace the snapshot with ``entries`` (sorted (id bytes, data) pairs)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), int(built_at)))
+        for entry_id, _ in entries:
+            f.write(entry_id)
+        offset = 0
+        f.write(OFFSET.pack(offset))
+        for _, data in entries:
+            offset += len(data) + 1
+            f.write(OFFSET.pack(offset))
+        for _, data in entries:
+            f.write(data)
+            f.write(b',')
+    os.replace(tmp_path, path)
+
+
+def delta_paths(path):
+    """The current delta file and the one being folded into a rebuild."""
+    return f"{path}.delta", f"{path}.delta.old"
+
+
+def append_entries(db, path, user_ids):
+    """Append the current entries for ``user_ids`` to the delta file.
+
+    Each batch is one O_APPEND write, so workers appending at the same time
+    never interleave records, and no lock is needed.
+    """
+    ids = sorted({user_id if isinstance(user_id, ObjectId) else ObjectId(user_id) for user_id in user_ids})
+    users = {user['_id']: user for user in db.users.find({"_id": {"$in": ids}}, DIRECTORY_PROJECTION)}
+    records = []
+    for user_id in ids:
+        if user_id in users:
+            data = encode_entry(users[user_id])
+            records.append(DELTA_RECORD.pack(user_id.binary, len(data)) + data)
+        else:
+            records.append(DELTA_RECORD.pack(user_id.binary, DELETED))
+    fd = os.open(delta_paths(path)[0], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b''.join(records))
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def snapshot_lock(path, blocking=True):
+    """Cross-process rebuild lock; yields False when ``blocking`` is off and another process holds it."""
+    with open(f"{path}.lock", 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def build_snapshot(db, path):
+    users = db.users.find({}, DIRECTORY_PROJECTION).sort("_id", 1)
+    write_snapshot(path, [(user['_id'].binary, encode_entry(user)) for user in users], time.time())
+
+
+def rebuild_snapshot(db, path):
+    """Rebuild the snapshot from Mongo and fold the delta into it. Call with snapshot_lock held.
+
+    The delta is moved aside first, so records appended during the rebuild
+    land in a fresh delta file and still apply over the new snapshot.
+    Readers keep applying the moved-aside records until the new snapshot
+    is in place.
+    """
+    delta_path, old_path = delta_paths(path)
+    try:
+        os.replace(delta_path, old_path)
+    except FileNotFoundError:
+        pass
+    build_snapshot(db, path)
+    try:
+        os.remove(old_path)
+    except FileNotFoundError:
+        pass
+
+
+def needs_rebuild(path, max_age, max_delta_bytes):
+    try:
+        with open(path, 'rb') as f:
+            _, _, built_at = HEADER.unpack(f.read(HEADER.size))
+    except FileNotFoundError:
+        # Built on the first read; nothing to keep current until then.
+        return False
+    try:
+        delta_size = os.stat(delta_paths(path)[0]).st_size
+    except FileNotFoundError:
+        delta_size = 0
+    return time.time() - built_at > max_age or delta_size > max_delta_bytes
+
+
+_view = None
+_view_lock = threading.Lock()
+_delta_logs = {}
+
+
+def _load_view(path):
+    """Return the snapshot plus delta, re-reading only what changed since the last call.
+
+    The deltas are read before the snapshot: a rebuild replaces the snapshot
+    before it removes the old delta, so a reader never misses records that
+    the snapshot it sees does not contain yet.
+    """
+    global _view
+    with _view_lock:
+        if path not in _delta_logs:
+            _delta_logs[path] = [DeltaLog(delta_path) for delta_path in reversed(delta_paths(path))]
+        logs = _delta_logs[path]
+        changed = False
+        for log in reversed(logs):
+            changed = log.update() or changed
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if _view is not None and _view.snapshot.identity == (stat.st_ino, stat.st_mtime_ns):
+            snapshot = _view.snapshot
+        else:
+            snapshot = DirectorySnapshot(path)
+            changed = True
+        if changed:
+            overlay = {}
+            for log in logs:
+                overlay.update(log.entries)
+            _view = DirectoryView(snapshot, overlay)
+        return _view
+
+
+def get_directory_snapshot():
+    """Return the current directory, building the snapshot only if there is none yet.
+
+    A replaced snapshot is noticed through its inode/mtime and new delta
+    records through the delta file's size, so one worker's writes are
+    picked up by every other worker on its next read. Rebuilds for age
+    (DIRECTORY_SNAPSHOT_MAX_AGE) or a large delta run in the background.
+    """
+    path = app.config['DIRECTORY_SNAPSHOT_PATH']
+    _start_refresher()
+    view = _load_view(path)
+    if view is None:
+        with snapshot_lock(path):
+            # Another worker may have built it while we waited for the lock.
+            if not os.path.exists(path):
+                rebuild_snapshot(mongo.db, path)
+        view = _load_view(path)
+    return view
+
+
+_pending = set()
+_pending_lock = threading.Lock()
+_wake_event = threading.Event()
+_refresher_pid = None
+
+
+def _refresh_forever(flask_app):
+    with flask_app.app_context():
+        path = app.config['DIRECTORY_SNAPSHOT_PATH']
+        while True:
+            _wake_event.wait(app.config['DIRECTORY_REFRESH_SECONDS'])
+            _wake_event.clear()
+            with _pending_lock:
+                user_ids = list(_pending)
+                _pending.clear()
+            try:
+                if user_ids:
+                    append_entries(mongo.db, path, user_ids)
+                if needs_rebuild(path, app.config['DIRECTORY_SNAPSHOT_MAX_AGE'], app.config['DIRECTORY_DELTA_MAX_BYTES']):
+                    with snapshot_lock(path, blocking=False) as locked:
+                        # Skip if another worker is already rebuilding or just did.
+                        if locked and needs_rebuild(path, app.config['DIRECTORY_SNAPSHOT_MAX_AGE'], app.config['DIRECTORY_DELTA_MAX_BYTES']):
+                            rebuild_snapshot(mongo.db, path)
+            except Exception as e:
+                print(f"Error refreshing directory snapshot: {e}")
+
+
+def _start_refresher():
+    # One background thread per (forked) process.
+    global _refresher_pid
+    with _pending_lock:
+        if _refresher_pid != os.getpid():
+            _refresher_pid = os.getpid()
+            threading.Thread(target=_refresh_forever, args=(app._get_current_object(),), name="directory-refresh", daemon=True).start()
+
+
+def refresh_directory_entry(user_id):
+    """Queue one user's directory entry for refresh after a profile write.
+
+    The entry is re-read and appended to the delta by this worker's
+    background thread, so the request only adds an id to a set.
+    """
+    _start_refresher()
+    with _pending_lock:
+        _pending.add(user_id)
+    _wake_event.set()
@@ -0,0 +1,154 @@
+import base64
+import datetime
+from bson import json_util
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+TAG_FACET_LIMIT = 30
+
+
+def parse_page_size(value, default=FEED_PAGE_SIZE, maximum=FEED_MAX_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, maximum)
+
+
+def encode_cursor(document, sort_field='created_at'):
+    # json_util keeps the BSON type of the sort value (datetime, string, ...)
+    # so the next page compares against exactly what Mongo sorted on.
+    payload = json_util.dumps({"v": document.get(sort_field), "id": document["_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return payload["v"], payload["id"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# created_at as a date: older projects stored it as a string ("2024-06-01")
+# or not at all, and those fall back to when their _id was generated.
+CREATED_AT_AS_DATE = {"$convert": {
+    "input": "$created_at",
+    "to": "date",
+    "onError": {"$toDate": "$_id"},
+    "onNull": {"$toDate": "$_id"},
+}}
+
+
+def as_created_at(value, fallback):
+    """Coerce a created_at read from an old document (datetime, ISO string, missing) to a datetime."""
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return fallback
+    if isinstance(value, datetime.datetime):
+        return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
+    return fallback
+
+
+def migrate_created_at(db):
+    """Store created_at as a date on every project; returns how many were changed.
+
+    Keyset pages compare created_at with $lt, and BSON type bracketing means
+    a string or missing created_at never matches a date, so those projects
+    dropped out of every page after the first.
+    """
+    result = db.projects.update_many(
+        {"created_at": {"$not": {"$type": "date"}}},
+        [{"$set": {"created_at": CREATED_AT_AS_DATE}}],
+    )
+    return result.modified_count
+
+
+def feed_pipeline(sort_field='created_at', cursor=None, limit=FEED_PAGE_SIZE, match=None):
+    """Build the single aggregation that returns one feed page with its comments.
+
+    Pages are keyed on (sort_field, _id) descending, so every page is an index
+    range scan on the matching compound index instead of a skip over the
+    collection. One extra document is fetched to tell whether a next page exists.
+    """
+    stages = []
+    if match:
+        stages.append({"$match": match})
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        stages.append({"$match": {"$or": [
+            {sort_field: {"$lt": value}},
+            {sort_field: value, "_id": {"$lt": last_id}},
+        ]}})
+    stages += [
+        {"$sort": {sort_field: -1, "_id": -1}},
+        {"$limit": limit + 1},
+        # Older projects store comment ids as strings; normalise them so the
+        # $lookup can use the comments _id index.
+        {"$addFields": {"comment_ids": {"$map": {
+            "input": {"$ifNull": ["$comments", []]},
+            "in": {"$toObjectId": "$$this"},
+        }}}},
+        {"$lookup": {
+            "from": "comments",
+            "localField": "comment_ids",
+            "foreignField": "_id",
+            "as": "comments",
+        }},
+        {"$project": {"comment_ids": 0}},
+    ]
+    return stages
+
+
+class FeedPage:
+    """Iterates one page of feed documents straight off the aggregation cursor.
+
+    ``next_cursor`` is filled in once iteration reaches the extra look-ahead
+    document, which lets streaming responses emit it after the last project.
+    """
+
+    def __init__(self, db, sort_field='created_at', cursor=None, limit=FEED_PAGE_SIZE, match=None):
+        self.sort_field = sort_field
+        self.limit = limit
+        self.next_cursor = None
+        self._cursor = db.projects.aggregate(feed_pipeline(sort_field, cursor, limit, match))
+
+    def __iter__(self):
+        last = None
+        for count, project in enumerate(self._cursor):
+            if count == self.limit:
+                self.next_cursor = encode_cursor(last, self.sort_field)
+                break
+            last = project
+            yield project
+        self._cursor.close()
+
+
+def tag_match(tags, mode='and'):
+    if not tags:
+        return None
+    if mode == 'and':
+        return {"tags": {"$all": tags}}
+    if mode == 'or':
+        return {"tags": {"$in": tags}}
+    raise ValueError("mode must be 'and' or 'or'")
+
+
+def tag_facets(db, tags, match=None, limit=TAG_FACET_LIMIT):
+    """Count the other tags carried by the projects that ``match`` selects."""
+    pipeline = [
+        {"$match": match or {"tags": {"$exists": True, "$ne": []}}},
+        {"$project": {"_id": 0, "tags": 1}},
+        {"$unwind": "$tags"},
+        {"$match": {"tags": {"$nin": tags}}},
+        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return [{"tag": facet["_id"], "count": facet["count"]} for facet in db.projects.aggregate(pipeline)]
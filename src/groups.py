@@ -0,0 +1,38 @@
+# Fields that grow with group activity; list endpoints never read them and
+# the detail endpoint only projects the ones the client asks for.
+GROUP_HEAVY_FIELDS = ('users', 'projects', 'comment_json', 'project_content')
+
+GROUP_SUMMARY_FIELDS = {
+    "name": "$groupName",
+    "description": "$groupDescription",
+    "createdBy": 1,
+    "created_at": 1,
+    "member_count": {"$size": {"$ifNull": ["$users", []]}},
+    "project_count": {"$size": {"$ifNull": ["$projects", []]}},
+    "last_activity": {"$ifNull": ["$last_activity", "$created_at"]},
+}
+
+
+def group_summary_pipeline(match=None):
+    stages = []
+    if match:
+        stages.append({"$match": match})
+    stages.append({"$project": GROUP_SUMMARY_FIELDS})
+    return stages
+
+
+def group_detail_pipeline(group_id, fields=GROUP_HEAVY_FIELDS):
+    projection = dict(GROUP_SUMMARY_FIELDS)
+    for field in fields:
+        projection[field] = 1
+    return [{"$match": {"_id": group_id}}, {"$project": projection}]
+
+
+def parse_group_fields(value):
+    if not value:
+        return GROUP_HEAVY_FIELDS
+    fields = tuple(field for field in value.split(',') if field)
+    unknown = set(fields) - set(GROUP_HEAVY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown group fields: {', '.join(sorted(unknown))}")
+    return fields
@@ -0,0 +1,31 @@
+from pymongo import ASCENDING, DESCENDING
+from .search import USER_SEARCH_INDEX, PROJECT_SEARCH_INDEX
+
+
+def ensure_indexes(db):
+    # Keyset pagination for /returnFeed
+    db.projects.create_index([("created_at", DESCENDING), ("_id", DESCENDING)], name="feed_created_at")
+    # Keyset pagination for /returnRankedFeed
+    db.projects.create_index([("hot_score", DESCENDING), ("_id", DESCENDING)], name="feed_hot_score")
+    # Multikey index for /tagFeed filters and facet counts
+    db.projects.create_index([("tags", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="feed_tags")
+
+    # Full-text search for /userFilteredSearch and /projectFilteredSearch
+    db.users.create_index(USER_SEARCH_INDEX["keys"], weights=USER_SEARCH_INDEX["weights"], name=USER_SEARCH_INDEX["name"])
+    db.projects.create_index(PROJECT_SEARCH_INDEX["keys"], weights=PROJECT_SEARCH_INDEX["weights"], name=PROJECT_SEARCH_INDEX["name"])
+
+    # One upvote per user and project
+    db.upvotes.create_index([("user_id", ASCENDING), ("project_id", ASCENDING)], unique=True, name="upvote_once")
+
+    # LLM response cache: expire by TTL, evict least recently used
+    db.llm_cache.create_index("expires_at", expireAfterSeconds=0, name="llm_cache_ttl")
+    db.llm_cache.create_index("last_used_at", name="llm_cache_lru")
+
+    # Parse job queue: claim oldest first, poll by handle, drop finished jobs after their TTL
+    db.jobs.create_index([("status", ASCENDING), ("created_at", ASCENDING)], name="jobs_claim")
+    db.jobs.create_index("expires_at", expireAfterSeconds=0, name="jobs_ttl")
+    db.jobs.create_index("handle_hash", unique=True, sparse=True, name="jobs_handle")
+
+    # /SignUp relies on these instead of checking first
+    db.users.create_index("email", unique=True, partialFilterExpression={"email": {"$type": "string"}}, name="user_email_unique")
+    db.groups.create_index("groupName", unique=True, partialFilterExpression={"major_group": True}, name="major_group_name")
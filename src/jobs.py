@@ -0,0 +1,199 @@
+import datetime
+import hashlib
+import os
+import secrets
+import socket
+import threading
+from flask import current_app as app
+from pymongo import ReturnDocument
+from . import mongo
+from .summarize import summarize_text_for_sign, summarize_text_description_title_tags, summarize_text_layers, summarize_concurrently
+
+# Jobs move queued -> running -> done | failed. A running job holds a lease;
+# if its worker dies the lease runs out and another worker picks it up again,
+# up to JOB_MAX_ATTEMPTS times.
+JOB_MAX_ATTEMPTS = 3
+JOB_POLL_SECONDS = 2.0
+
+
+def run_resume_job(payload):
+    summary = summarize_text_for_sign(payload['resumeText'])
+    if not summary:
+        raise RuntimeError("Failed to parse resume")
+    return {'summary': summary}
+
+
+def run_project_file_job(payload):
+    results, errors = summarize_concurrently({
+        'surrounding_summary': (summarize_text_description_title_tags, payload['fileText']),
+        'summary_content': (summarize_text_layers, payload['fileText']),
+    })
+    if len(errors) == len(results):
+        raise RuntimeError(f"Failed to parse proj file: {errors}")
+    if errors:
+        results['errors'] = errors
+    return results
+
+
+JOB_HANDLERS = {
+    'resume': run_resume_job,
+    'project_file': run_project_file_job,
+}
+
+
+def job_handle_hash(handle):
+    return hashlib.sha256(handle.encode()).hexdigest()
+
+
+def submit_job(kind, payload, owner=None):
+    """Queue a job and return the handle its submitter polls it with.
+
+    Only the handle's hash is stored, so job ids and database reads never
+    reveal it. ``owner`` (a JWT identity) restricts polling to that user.
+    """
+    handle = secrets.token_urlsafe(32)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    mongo.db.jobs.insert_one({
+        "kind": kind,
+        "status": "queued",
+        "input": payload,
+        "attempts": 0,
+        "handle_hash": job_handle_hash(handle),
+        "owner": owner,
+        "created_at": now,
+    })
+    _wake_workers()
+    return handle
+
+
+def find_job(db, handle, owner=None):
+    """Look a job up by its handle; jobs submitted by a signed-in user are only visible to them."""
+    job = db.jobs.find_one({"handle_hash": job_handle_hash(handle)}, {"input": 0})
+    if job and job.get("owner") is not None and job["owner"] != owner:
+        return None
+    return job
+
+
+def fail_abandoned_jobs(db, now):
+    """Fail jobs whose last allowed attempt died with its worker (OOM, timeout), instead of leasing them again."""
+    db.jobs.update_many(
+        {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+        {"$set": {
+            "status": "failed",
+            "error": f"Worker stopped during each of {JOB_MAX_ATTEMPTS} attempts",
+            "finished_at": now,
+            "expires_at": now + datetime.timedelta(seconds=app.config['JOB_RESULT_TTL_SECONDS']),
+        }, "$unset": {"lease_expires_at": ""}},
+    )
+
+
+def claim_job(db, lease_seconds):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    fail_abandoned_jobs(db, now)
+    return db.jobs.find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$lt": JOB_MAX_ATTEMPTS}},
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "started_at": now,
+                "lease_expires_at": now + datetime.timedelta(seconds=lease_seconds),
+                "worker": f"{socket.gethostname()}:{os.getpid()}",
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def finish_job(db, job, result=None, error=None):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    db.jobs.update_one({"_id": job["_id"]}, {"$set": {
+        "status": "failed" if error else "done",
+        "result": result,
+        "error": error,
+        "finished_at": now,
+        "duration_ms": int((now - job["started_at"]).total_seconds() * 1000),
+        "queue_ms": int((job["started_at"] - job["created_at"]).total_seconds() * 1000),
+        "expires_at": now + datetime.timedelta(seconds=app.config['JOB_RESULT_TTL_SECONDS']),
+    }, "$unset": {"lease_expires_at": ""}})
+
+
+def run_next_job(db):
+    """Claim and run one job; returns False when the queue is empty."""
+    job = claim_job(db, app.config['JOB_LEASE_SECONDS'])
+    if not job:
+        return False
+    handler = JOB_HANDLERS.get(job["kind"])
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind {job['kind']!r}")
+        finish_job(db, job, result=handler(job["input"]))
+    except Exception as e:
+        print(f"Error running job {job['_id']}: {e}")
+        if job["attempts"] >= JOB_MAX_ATTEMPTS or handler is None:
+            finish_job(db, job, error=str(e))
+        else:
+            db.jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "queued", "error": str(e)}})
+    return True
+
+
+def job_status(job):
+    return {
+        "kind": job["kind"],
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "attempts": job.get("attempts", 0),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "queue_ms": job.get("queue_ms"),
+        "duration_ms": job.get("duration_ms"),
+    }
+
+
+def worker_loop(flask_app, stop_event=None, wake_event=None):
+    """Process jobs until ``stop_event`` is set, sleeping while the queue is empty."""
+    stop_event = stop_event or threading.Event()
+    with flask_app.app_context():
+        while not stop_event.is_set():
+            try:
+                if run_next_job(mongo.db):
+                    continue
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            if wake_event is not None:
+                wake_event.wait(JOB_POLL_SECONDS)
+                wake_event.clear()
+            else:
+                stop_event.wait(JOB_POLL_SECONDS)
+
+
+_wake_event = threading.Event()
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def start_job_workers(flask_app, count):
+    """Start ``count`` worker threads in this process (once per process)."""
+    global _workers_pid
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        for index in range(count):
+            threading.Thread(target=worker_loop, args=(flask_app, None, _wake_event), name=f"job-worker-{index}", daemon=True).start()
+
+
+def _wake_workers():
+    # Web processes only enqueue; the run-job-worker process picks the job
+    # up on its next poll. JOB_WORKERS_IN_WEB opts into running jobs here
+    # too, e.g. for a single-process development server.
+    in_web = app.config['JOB_WORKERS_IN_WEB']
+    if in_web:
+        start_job_workers(app._get_current_object(), in_web)
+        _wake_event.set()
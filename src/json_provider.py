@@ -0,0 +1,68 @@
+import msgspec
+from bson import ObjectId, Binary, Decimal128, DBRef, Timestamp
+from bson.binary import UUID_SUBTYPE
+from flask.json.provider import JSONProvider
+
+
+def enc_hook(obj):
+    """Encode the BSON types msgspec does not know about.
+
+    datetime, date, uuid, bytes and the builtin containers are handled by
+    msgspec itself; this is only called for everything else.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Timestamp):
+        return obj.as_datetime()
+    if isinstance(obj, Binary):
+        # Standard UUIDs as their canonical string, anything else as base64 like bytes.
+        return obj.as_uuid() if obj.subtype == UUID_SUBTYPE else bytes(obj)
+    if isinstance(obj, DBRef):
+        return {"$ref": obj.collection, "$id": obj.id}
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple, set)):
+        return list(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    raise NotImplementedError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+encoder = msgspec.json.Encoder(enc_hook=enc_hook)
+sorted_encoder = msgspec.json.Encoder(enc_hook=enc_hook, order='deterministic')
+
+
+class MsgspecJSONProvider(JSONProvider):
+    """Flask JSON provider that serializes raw Mongo documents in one msgspec pass.
+
+    Routes can hand documents straight to ``jsonify`` without converting
+    ObjectIds first.
+    """
+
+    def dumps(self, obj, **kwargs):
+        """Supports json.dumps' sort_keys and indent; other options raise instead of being ignored.
+
+        Output is always compact unless indent is given, so separators is accepted and unused.
+        """
+        sort_keys = kwargs.pop('sort_keys', False)
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)
+        if kwargs:
+            raise TypeError(f"Unsupported dumps options: {', '.join(kwargs)}")
+        data = (sorted_encoder if sort_keys else encoder).encode(obj)
+        if indent is not None:
+            data = msgspec.json.format(data, indent=indent)
+        return data.decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        try:
+            return msgspec.json.decode(s)
+        except msgspec.DecodeError as e:
+            # Werkzeug only turns ValueError into a 400 response.
+            raise ValueError(str(e)) from e
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encoder.encode(obj), mimetype='application/json')
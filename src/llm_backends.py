@@ -0,0 +1,143 @@
+import json
+import os
+import random
+import re
+import time
+from flask import current_app as app
+
+LLM_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "You are a helpful assistant. Please do not include headers like 'Summary:' when summarizing content."
+
+
+class OpenAIBackend:
+    model = LLM_MODEL
+
+    def __init__(self):
+        # openai (and aiohttp under it) is slow to import, so it is loaded
+        # with the first backend rather than at app startup.
+        import openai
+        openai.api_key = os.getenv('OPENAI_API_KEY')
+        self.openai = openai
+        # Upstream trouble worth retrying; anything else (bad request, auth) is not.
+        self.retryable_errors = (
+            openai.error.RateLimitError,
+            openai.error.APIError,
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+            openai.error.ServiceUnavailableError,
+            openai.error.TryAgain,
+        )
+
+    def _create(self, prompt, max_tokens, **kwargs):
+        return self.openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            n=1,
+            stop=None,
+            temperature=0.5,
+            request_timeout=app.config['LLM_TIMEOUT_SECONDS'],
+            **kwargs
+        )
+
+    def complete(self, prompt, max_tokens=600):
+        """Run one completion; returns (content, total tokens used)."""
+        response = self._create(prompt, max_tokens)
+        return response.choices[0].message['content'].strip(), response.get('usage', {}).get('total_tokens', 0)
+
+    def stream(self, prompt, max_tokens=600):
+        """Yield the completion's text as OpenAI streams it back."""
+        for chunk in self._create(prompt, max_tokens, stream=True):
+            delta = chunk.choices[0].delta.get('content')
+            if delta:
+                yield delta
+
+
+class FakeLLMBackend:
+    """Offline stand-in for OpenAI that answers our three prompts deterministically.
+
+    Responses are built from the input text, so the same input always gives
+    the same output and different inputs are distinguishable in tests.
+    Set LLM_BACKEND=fake to use it; LLM_FAKE_LATENCY_SECONDS simulates
+    upstream latency and LLM_FAKE_FAILURE_RATE makes that fraction of calls
+    fail with a retryable error.
+    """
+
+    model = "fake"
+    retryable_errors = (ConnectionError, TimeoutError)
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    @staticmethod
+    def _input(prompt):
+        return prompt.rsplit("Here is the text:\n\n", 1)[-1]
+
+    def complete(self, prompt, max_tokens=600):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    def stream(self, prompt, max_tokens=600, piece_size=24):
+        """Yield the same response as complete() in small pieces.
+
+        A tenth of the latency passes before the first piece and the rest is
+        spread across the others, like a real streamed completion.
+        """
+        if self.latency:
+            time.sleep(self.latency / 10)
+        content, _ = self._respond(prompt)
+        pieces = [content[index:index + piece_size] for index in range(0, len(content), piece_size)]
+        for piece in pieces:
+            yield piece
+            if self.latency:
+                time.sleep(self.latency * 0.9 / len(pieces))
+
+    def _respond(self, prompt):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("Simulated upstream failure")
+        text = self._input(prompt)
+        words = re.findall(r"\w+", text)
+        title = " ".join(words[:4]) or "Untitled"
+        if "keys: bio" in prompt:
+            content = {
+                "bio": f"I am working on {title}.",
+                "skills": sorted(set(word.lower() for word in words[:5])),
+                "interests": sorted(set(word.lower() for word in words[5:10])),
+                "latestUniversity": "",
+                "major": "",
+                "grad_yr": "",
+                "projects": [],
+            }
+        elif "keys: name, tags, description" in prompt:
+            content = {
+                "name": title,
+                "tags": sorted(set(word.lower() for word in words if len(word) > 6))[:5],
+                "description": " ".join(words[:40]),
+            }
+        elif "'index' and 'content'" in prompt:
+            sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", text) if sentence.strip()]
+            chunks = [" ".join(sentences[index:index + 3]) for index in range(0, len(sentences), 3)] or [text]
+            content = [{"index": index, "content": chunk} for index, chunk in enumerate(chunks)]
+        else:
+            content = {"summary": " ".join(words[:60])}
+        return json.dumps(content), len(words)
+
+
+_backends = {}
+
+
+def get_llm_backend():
+    name = app.config['LLM_BACKEND']
+    if name not in _backends:
+        if name == 'openai':
+            _backends[name] = OpenAIBackend()
+        elif name == 'fake':
+            _backends[name] = FakeLLMBackend(app.config['LLM_FAKE_LATENCY_SECONDS'], app.config['LLM_FAKE_FAILURE_RATE'])
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND {name!r}")
+    return _backends[name]
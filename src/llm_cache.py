@@ -0,0 +1,125 @@
+import datetime
+import hashlib
+import time
+from flask import current_app as app
+from pymongo import ReturnDocument
+from . import mongo
+
+# Eviction is checked every this many writes rather than on each one.
+EVICTION_CHECK_INTERVAL = 50
+STATS_ID = "llm_cache"
+
+_writes_since_eviction = 0
+
+
+def normalize_text(text):
+    return " ".join((text or "").split())
+
+
+def cache_key(template, model, text):
+    """Content address for one completion: prompt template, model and normalized input."""
+    payload = "\x00".join([template, model, normalize_text(text)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _record(field_increments):
+    try:
+        mongo.db.llm_cache_stats.update_one({"_id": STATS_ID}, {"$inc": field_increments}, upsert=True)
+    except Exception as e:
+        print(f"Error recording LLM cache stats: {e}")
+
+
+def cache_get(key):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    entry = mongo.db.llm_cache.find_one_and_update(
+        {"_id": key, "expires_at": {"$gt": now}},
+        {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+        projection={"content": 1, "latency_ms": 1, "tokens": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if entry:
+        _record({"hits": 1, "saved_ms": entry.get("latency_ms", 0), "saved_tokens": entry.get("tokens", 0)})
+        return entry["content"]
+    _record({"misses": 1})
+    return None
+
+
+def cache_set(key, content, latency_ms, tokens):
+    global _writes_since_eviction
+    now = datetime.datetime.now(datetime.timezone.utc)
+    mongo.db.llm_cache.update_one(
+        {"_id": key},
+        {"$set": {
+            "content": content,
+            "latency_ms": latency_ms,
+            "tokens": tokens,
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": now + datetime.timedelta(seconds=app.config['LLM_CACHE_TTL_SECONDS']),
+        }, "$setOnInsert": {"hits": 0}},
+        upsert=True,
+    )
+    _writes_since_eviction += 1
+    if _writes_since_eviction >= EVICTION_CHECK_INTERVAL:
+        _writes_since_eviction = 0
+        evict_least_recently_used(app.config['LLM_CACHE_MAX_ENTRIES'])
+
+
+def evict_least_recently_used(max_entries):
+    """Trim the cache back to ``max_entries``; the TTL index handles expiry."""
+    excess = mongo.db.llm_cache.estimated_document_count() - max_entries
+    if excess <= 0:
+        return
+    stale = mongo.db.llm_cache.find({}, {"_id": 1}).sort("last_used_at", 1).limit(excess)
+    mongo.db.llm_cache.delete_many({"_id": {"$in": [entry["_id"] for entry in stale]}})
+
+
+def is_cacheable(content, validate=None):
+    if validate is None:
+        return True
+    try:
+        validate(content)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Not caching unparseable LLM response: {e}")
+        return False
+    return True
+
+
+def cached_completion(template, model, text, compute, validate=None):
+    """Return the cached completion for (template, model, text), or compute and store it.
+
+    ``compute`` returns (content, total_tokens). Empty results, and results
+    ``validate`` raises on (truncated or malformed JSON, say), are returned
+    but never cached, so a retry makes a fresh call. Cache errors fall
+    through to a live call.
+    """
+    key = cache_key(template, model, text)
+    try:
+        content = cache_get(key)
+        if content is not None:
+            return content
+    except Exception as e:
+        print(f"Error reading LLM cache: {e}")
+
+    start = time.monotonic()
+    content, tokens = compute()
+    latency_ms = int((time.monotonic() - start) * 1000)
+    if content and is_cacheable(content, validate):
+        try:
+            cache_set(key, content, latency_ms, tokens)
+        except Exception as e:
+            print(f"Error writing LLM cache: {e}")
+    return content
+
+
+def cache_stats():
+    stats = mongo.db.llm_cache_stats.find_one({"_id": STATS_ID}) or {}
+    hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "saved_ms": stats.get("saved_ms", 0),
+        "saved_tokens": stats.get("saved_tokens", 0),
+        "entries": mongo.db.llm_cache.estimated_document_count(),
+    }
@@ -0,0 +1,253 @@
+import os
+import random
+import threading
+import time
+from flask import current_app as app
+from .llm_backends import get_llm_backend
+from .chunking import estimate_tokens
+
+
+class LLMError(RuntimeError):
+    """An LLM call failed after its retries."""
+
+
+class LLMUnavailable(LLMError):
+    """The call was refused without reaching upstream: breaker open, rate limited or saturated."""
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take one token, waiting up to ``timeout`` seconds; returns False if none came free."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Closed until ``failure_threshold`` upstream failures in a row, then open.
+
+    While open every call fails fast. After ``reset_seconds`` one trial call
+    is let through (half open): success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def cancel_trial(self):
+        """Give up a trial slot that never reached upstream."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    """Process-wide gate in front of the LLM backend.
+
+    Each attempt needs the breaker to allow it, a rate-limit token and a
+    concurrency slot; waiting for either is bounded by ``queue_timeout``, so
+    a stalled upstream makes callers fail with LLMUnavailable rather than
+    pile up behind it. Retryable errors back off exponentially with full
+    jitter.
+    """
+
+    def __init__(self, backend, max_concurrency, rate, burst, queue_timeout,
+                 max_retries, backoff_base, backoff_max, breaker):
+        self.backend = backend
+        self.model = backend.model
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.in_flight = 0
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0,
+                      "tokens": 0, "latency_ms_total": 0, "latency_ms_max": 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, **increments):
+        with self.stats_lock:
+            for field, amount in increments.items():
+                self.stats[field] += amount
+
+    def _reject(self, reason):
+        self._count(rejected=1)
+        raise LLMUnavailable(reason)
+
+    def _acquire(self):
+        """Pass the breaker, rate limit and concurrency gates; returns the start time."""
+        if not self.breaker.allow():
+            self._reject("LLM circuit breaker is open")
+        if not self.bucket.acquire(self.queue_timeout):
+            self.breaker.cancel_trial()
+            self._reject("LLM rate limit exceeded")
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel_trial()
+            self._reject("Too many LLM calls in flight")
+        with self.stats_lock:
+            self.stats["calls"] += 1
+            self.in_flight += 1
+        return time.monotonic()
+
+    def _release(self, start):
+        self.slots.release()
+        latency_ms = int((time.monotonic() - start) * 1000)
+        with self.stats_lock:
+            self.in_flight -= 1
+            self.stats["latency_ms_total"] += latency_ms
+            self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], latency_ms)
+
+    def _attempt(self, prompt, max_tokens):
+        start = self._acquire()
+        try:
+            return self.backend.complete(prompt, max_tokens=max_tokens)
+        finally:
+            self._release(start)
+
+    def _backoff(self, attempt):
+        self._count(retries=1)
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def complete(self, prompt, max_tokens=600):
+        """Run one completion; returns (content, total tokens) or raises LLMError."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                content, tokens = self._attempt(prompt, max_tokens)
+            except LLMUnavailable:
+                raise
+            except self.backend.retryable_errors as e:
+                self.breaker.record_failure()
+                self._count(failures=1)
+                if attempt == self.max_retries:
+                    raise LLMError(f"LLM call failed after {attempt + 1} attempts: {e}") from e
+                self._backoff(attempt)
+            except Exception as e:
+                self.breaker.cancel_trial()
+                self._count(failures=1)
+                raise LLMError(f"LLM call failed: {e}") from e
+            else:
+                self.breaker.record_success()
+                self._count(successes=1, tokens=tokens or 0)
+                return content, tokens
+
+    def stream(self, prompt, max_tokens=600):
+        """Yield completion text as it arrives; raises LLMError if the call fails.
+
+        The concurrency slot is held until the stream ends or is closed.
+        Failures are retried only before the first piece has been yielded,
+        since the caller may already have acted on it.
+        """
+        for attempt in range(self.max_retries + 1):
+            start = self._acquire()
+            received = []
+            # Whether the breaker has heard how this attempt went; a stream
+            # closed early (GeneratorExit) must still give up its trial slot.
+            settled = False
+            try:
+                for delta in self.backend.stream(prompt, max_tokens=max_tokens):
+                    received.append(delta)
+                    yield delta
+            except self.backend.retryable_errors as e:
+                settled = True
+                self.breaker.record_failure()
+                self._count(failures=1)
+                if received or attempt == self.max_retries:
+                    raise LLMError(f"LLM stream failed after {attempt + 1} attempts: {e}") from e
+            except Exception as e:
+                self._count(failures=1)
+                raise LLMError(f"LLM stream failed: {e}") from e
+            else:
+                settled = True
+                self.breaker.record_success()
+                # Streamed responses carry no usage, so estimate it.
+                self._count(successes=1, tokens=estimate_tokens(prompt) + estimate_tokens("".join(received)))
+                return
+            finally:
+                if not settled:
+                    self.breaker.cancel_trial()
+                self._release(start)
+            self._backoff(attempt)
+
+    def metrics(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = self.in_flight
+        stats["latency_ms_avg"] = stats["latency_ms_total"] / stats["calls"] if stats["calls"] else 0.0
+        stats["breaker"] = self.breaker.state
+        stats["model"] = self.model
+        stats["pid"] = os.getpid()
+        return stats
+
+
+_clients = {}
+
+
+def get_llm_client():
+    """The LLM client for the configured backend, one per worker process."""
+    key = (app.config['LLM_BACKEND'], os.getpid())
+    if key not in _clients:
+        _clients[key] = LLMClient(
+            get_llm_backend(),
+            max_concurrency=app.config['LLM_MAX_CONCURRENCY'],
+            rate=app.config['LLM_RATE_PER_SECOND'],
+            burst=app.config['LLM_RATE_BURST'],
+            queue_timeout=app.config['LLM_QUEUE_TIMEOUT_SECONDS'],
+            max_retries=app.config['LLM_MAX_RETRIES'],
+            backoff_base=app.config['LLM_BACKOFF_BASE_SECONDS'],
+            backoff_max=app.config['LLM_BACKOFF_MAX_SECONDS'],
+            breaker=CircuitBreaker(app.config['LLM_BREAKER_FAILURES'], app.config['LLM_BREAKER_RESET_SECONDS']),
+        )
+    return _clients[key]
@@ -0,0 +1,79 @@
+from bson import ObjectId
+from flask import g
+from . import mongo
+
+
+def to_object_id(value):
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
+class BatchLoader:
+    """Request-scoped, DataLoader-style cache for one collection.
+
+    Documents are keyed by _id. ``load_many`` resolves every id it has not
+    seen yet with a single ``$in`` query, so callers can gather ids for a
+    whole page first and pay one round trip per entity type.
+    """
+
+    def __init__(self, collection, projection=None):
+        self.collection = collection
+        self.projection = projection
+        self._cache = {}
+
+    def prime(self, document):
+        if document:
+            self._cache[document['_id']] = document
+
+    def load_many(self, ids):
+        ids = [to_object_id(id_) for id_ in ids if id_]
+        missing = list({id_ for id_ in ids if id_ not in self._cache})
+        if missing:
+            for document in self.collection.find({"_id": {"$in": missing}}, self.projection):
+                self._cache[document['_id']] = document
+            for id_ in missing:
+                self._cache.setdefault(id_, None)
+        return [self._cache[id_] for id_ in ids if self._cache[id_] is not None]
+
+    def load(self, id_):
+        documents = self.load_many([id_])
+        return documents[0] if documents else None
+
+
+class Loaders:
+    def __init__(self, db):
+        # Users are only loaded as comment authors, which need just the username.
+        self.users = BatchLoader(db.users, {"username": 1})
+        self.projects = BatchLoader(db.projects)
+        self.comments = BatchLoader(db.comments)
+
+
+def get_loaders():
+    if 'loaders' not in g:
+        g.loaders = Loaders(mongo.db)
+    return g.loaders
+
+
+def load_portfolio_with_comments(user):
+    """Fetch a user's projects, their comments and the comment authors.
+
+    Costs one query per entity type no matter how many projects or comments
+    the portfolio holds.
+    """
+    loaders = get_loaders()
+    loaders.users.prime(user)
+    projects = loaders.projects.load_many(user.get('portfolio', []))
+    comments = loaders.comments.load_many(
+        comment_id for project in projects for comment_id in project.get('comments', [])
+    )
+    loaders.users.load_many(comment.get('author_id') for comment in comments)
+
+    portfolio = []
+    for project in projects:
+        project_comments = []
+        for comment in loaders.comments.load_many(project.get('comments', [])):
+            author = loaders.users.load(comment['author_id']) if comment.get('author_id') else None
+            if author:
+                comment = dict(comment, author=author['username'])
+            project_comments.append(comment)
+        portfolio.append(dict(project, comments=project_comments))
+    return portfolio
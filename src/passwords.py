@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app as app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many password hashes are already queued; the caller should retry shortly."""
+
+
+def method_prefix(method):
+    """The parameter prefix werkzeug writes for ``method`` ("scrypt" -> "scrypt:32768:8:1")."""
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+def needs_rehash(stored_hash):
+    """True when ``stored_hash`` was made with other parameters than PASSWORD_HASH_METHOD."""
+    return stored_hash.split("$", 1)[0] != method_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+
+_pool = None
+_pool_pid = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Process pool for hashing, created lazily in each worker process.
+
+    Hashing holds the GIL for its whole run, so it cannot share a process
+    with request threads. Pool processes are spawned rather than forked so
+    they never inherit the worker's threads or open sockets.
+    """
+    global _pool, _pool_pid, _slots
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=app.config['PASSWORD_HASH_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+            _pool_pid = os.getpid()
+        return _pool, _slots
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _submit(func, *args):
+    """Queue ``func(*args)`` on the pool, or raise PasswordHasherBusy if the queue is full."""
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy("Password hashing queue is full")
+    try:
+        future = pool.submit(func, *args)
+    except BrokenProcessPool:
+        slots.release()
+        _reset_pool()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _run(func, *args):
+    future = _submit(func, *args)
+    try:
+        return future.result(timeout=app.config['PASSWORD_HASH_TIMEOUT_SECONDS'])
+    except FutureTimeoutError:
+        # Still queued behind other hashes: drop it and let the client retry.
+        future.cancel()
+        raise PasswordHasherBusy("Password hashing timed out")
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(stored_hash, password):
+    return _run(check_password_hash, stored_hash, password)
+
+
+def rehash_in_background(db, user_id, stored_hash, password):
+    """Re-hash a just-verified password with the current parameters, without delaying the response.
+
+    The write only applies if the stored hash is still the one we verified.
+    When the pool is busy the upgrade is skipped and happens on a later login.
+    """
+    try:
+        future = _submit(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'])
+    except (PasswordHasherBusy, BrokenProcessPool) as e:
+        print(f"Skipping password rehash: {e}")
+        return
+
+    def store(done):
+        try:
+            db.users.update_one({"_id": user_id, "password": stored_hash}, {"$set": {"password": done.result()}})
+        except Exception as e:
+            print(f"Error rehashing password: {e}")
+
+    future.add_done_callback(store)
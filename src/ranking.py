@@ -0,0 +1,38 @@
+import datetime
+import math
+from .feed import CREATED_AT_AS_DATE
+
+# "Hot" score in the style of Reddit's ranking: log-scaled activity plus a
+# bonus that grows linearly with creation time. Newer projects outrank older
+# ones unless the older ones have ~10x the activity per HOT_DECAY_SECONDS of
+# age. Because the time term is fixed at creation, a project's score only
+# changes when it gets an upvote or comment, so it can be stored on the
+# document and served straight from an index.
+HOT_EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+HOT_DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 0.5
+
+
+def hot_score(upvotes, comments, created_at):
+    activity = upvotes + COMMENT_WEIGHT * comments
+    return math.log10(max(activity, 1)) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+# The same formula as an update pipeline, so Mongo recomputes the score from
+# the stored counters in the same round trip as the write that changed them.
+_upvote_count = {"$ifNull": ["$upvote_count", {"$size": {"$ifNull": ["$upvotes", []]}}]}
+_comment_count = {"$size": {"$ifNull": ["$comments", []]}}
+HOT_SCORE_STAGE = {"$set": {"hot_score": {"$add": [
+    {"$log10": {"$max": [{"$add": [_upvote_count, {"$multiply": [COMMENT_WEIGHT, _comment_count]}]}, 1]}},
+    {"$divide": [{"$subtract": [CREATED_AT_AS_DATE, HOT_EPOCH]}, HOT_DECAY_SECONDS * 1000]},
+]}}}
+
+
+def refresh_hot_score(db, project_id, session=None):
+    db.projects.update_one({"_id": project_id}, [HOT_SCORE_STAGE], session=session)
+
+
+def rank_all_projects(db, only_missing=False):
+    """Recompute hot_score; with ``only_missing``, just for projects written before it existed."""
+    query = {"hot_score": {"$exists": False}} if only_missing else {}
+    return db.projects.update_many(query, [HOT_SCORE_STAGE]).modified_count
@@ -1,40 +1,41 @@
 
 
 
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, request, jsonify, send_from_directory
 from flask import current_app as app
 from flask_cors import cross_origin
 from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 import os
-import openai
-from dotenv import load_dotenv
 import datetime
 import uuid
 import hashlib
-from bson import json_util, ObjectId
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 import copy
 from .routes_schema_utility import get_user_details, get_user_context_details, get_user_feed_details, get_portfolio_details, get_project_feed_details
-from .fake_data import sample_users
+from .fake_data import build_sample_users
+from .feed import FeedPage, parse_page_size, tag_match, tag_facets, as_created_at
+from .streaming import stream_json_array, stream_events
+from .loaders import load_portfolio_with_comments
+from .current_user import get_current_user
+from .suggest import get_suggest_index, index_user, index_project, index_group, unindex_project, SUGGEST_LIMIT, SUGGEST_MAX_LIMIT, SUGGEST_TYPES
+from .directory_snapshot import get_directory_snapshot, refresh_directory_entry, DIRECTORY_PAGE_SIZE, DIRECTORY_MAX_PAGE_SIZE
+from .groups import group_summary_pipeline, group_detail_pipeline, parse_group_fields
+from .upvotes import add_upvote, remove_upvote, UpvoteTargetNotFound
+from .ranking import hot_score, refresh_hot_score
+from .summarize import summarize_text_for_sign, summarize_text_description_title_tags, summarize_text_layers, summarize_concurrently, submit_llm_task, stream_text_layers
+from .llm_cache import cache_stats
+from .llm_client import get_llm_client, LLMUnavailable
+from .jobs import submit_job, find_job, job_status
+from .passwords import hash_password, verify_password, needs_rehash, rehash_in_background, PasswordHasherBusy
+from .search import text_search, parse_page, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE, USER_SEARCH_PROJECTION, PROJECT_SEARCH_PROJECTION, USER_PREFIX_FIELDS, PROJECT_PREFIX_FIELDS
 from . import mongo
 import logging
 
-load_dotenv()
-openai.api_key = os.getenv('OPENAI_API_KEY')
-
 main_bp = Blueprint('main', __name__)
 
-def convert_objectid_to_str(data):
-    if isinstance(data, list):
-        return [convert_objectid_to_str(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: convert_objectid_to_str(value) for key, value in data.items()}
-    elif isinstance(data, ObjectId):
-        return str(data)
-    else:
-        return data
-
 @main_bp.route('/joinGroup', methods=['POST'])
 @jwt_required()
 def join_group():
@@ -42,7 +43,7 @@ def join_group():
     #print('entered the /joinGroup route')
     username = get_jwt_identity()
     #print('here is the username: ', username)
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
     #print('here is the user: ',user)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -59,12 +60,13 @@ def join_group():
         return jsonify({"error": "User already in the group"}), 400
     mongo.db.groups.update_one(
         {"_id": ObjectId(group_id)},
-        {"$push": {"users": user['_id']}}
+        {"$push": {"users": user['_id']}, "$set": {"last_activity": datetime.datetime.now(datetime.timezone.utc)}}
     )
     mongo.db.users.update_one(
         {"_id": user['_id']},
         {"$push": {"groups": ObjectId(group_id)}}
     )
+    refresh_directory_entry(user['_id'])
     return jsonify({"message": "Successfully joined the group"}), 200
 
 
@@ -115,7 +117,7 @@ def handle_group_comment():
         group = mongo.db.groups.find_one({"_id": ObjectId(group_id)})
         if not group:
             return jsonify({"error": "Group not found"}), 404
-        user = mongo.db.users.find_one({"username": get_jwt_identity()})
+        user = get_current_user(["_id", "username"])
         if not user:
             return jsonify({"error": "User not found"}), 404
         new_comment = {
@@ -134,7 +136,7 @@ def handle_group_comment():
         # Update group's comment_json field
         mongo.db.groups.update_one(
             {"_id": ObjectId(group_id)},
-            {"$push": {f"comment_json.{title}": new_comment["_id"]}}
+            {"$push": {f"comment_json.{title}": new_comment["_id"]}, "$set": {"last_activity": datetime.datetime.now(datetime.timezone.utc)}}
         )
         # Update user's comments field
         mongo.db.users.update_one(
@@ -142,6 +144,7 @@ def handle_group_comment():
             {"$push": {"comments": new_comment["_id"]}}
         )
         # Fetch updated comments
+        refresh_directory_entry(user['_id'])
         updated_group = mongo.db.groups.find_one({"_id": ObjectId(group_id)})
         updated_comments = [str(comment_id) for comment_id in updated_group['comment_json'][title]]
         return jsonify({"message": "Successfully added comment", "updatedComments": updated_comments}), 200
@@ -206,7 +209,6 @@ def return_projects_from_ids():
         projects = mongo.db.projects.find({"_id": {"$in": project_ids}})
         project_list = []
         for project in projects:
-            project = convert_objectid_to_str(project)
             project_list.append({
                 "_id": str(project["_id"]),
                 "projectName": project.get("projectName", ""),
@@ -219,8 +221,6 @@ def return_projects_from_ids():
                 "created_at": project.get("created_at", ""),
                 "comments": project.get("comments", []),
             })
-        #print('proejcts from ids project list: ', project_list)
-        project_list = convert_objectid_to_str(project_list)
         return jsonify(project_list), 200
     except Exception as e:
         print(f"Error fetching projects: {e}")
@@ -255,7 +255,7 @@ def save_project_to_group():
 
     mongo.db.groups.update_one(
         {"_id": group_id},
-        {"$push": {"projects": {"$each": project_ids}}}
+        {"$push": {"projects": {"$each": project_ids}}, "$set": {"last_activity": datetime.datetime.now(datetime.timezone.utc)}}
     )
 
     return jsonify({"message": "Successfully added projects to group"}), 200
@@ -265,7 +265,7 @@ def save_project_to_group():
 @jwt_required()
 def groupCreate():
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -282,11 +282,12 @@ def groupCreate():
         'project_content': data['groupProject_Content'],
         'projects': [],
         'comment_json': {'General Discussion': []},  # Initialize as an array
-        'created_at': datetime.datetime.utcnow(),
+        'created_at': datetime.datetime.now(datetime.timezone.utc),
     }
 
     group_insert_result = mongo.db.groups.insert_one(new_group)
     group_id = group_insert_result.inserted_id
+    index_group(new_group)
 
     return jsonify({"message": "Group created successfully", "group_id": str(group_id)}), 200
 
@@ -299,22 +300,8 @@ def groupCreate():
 @jwt_required()
 def return_groups():
     try:
-        groups = mongo.db.groups.find()
-        group_list = []
-        for group in groups:
-            group_list.append({
-                "_id": str(group["_id"]),  # Convert ObjectId to string
-                "name": group["groupName"],
-                "description": group["groupDescription"],
-                "createdBy": group["createdBy"],
-                "users": [str(user_id) for user_id in group["users"]],  # Convert each user_id to string
-                "project_content": group["project_content"],
-                "comment_json": group.get("comment_json", {}),  # Include comment_json or an empty JSON object
-                "created_at": group["created_at"],
-                "projects": [str(project_id) for project_id in group.get("projects", [])]  # Convert project ObjectId to string
-            })
-        group_list = convert_objectid_to_str(group_list)
-        return jsonify(group_list), 200
+        groups = mongo.db.groups.aggregate(group_summary_pipeline())
+        return stream_json_array(groups)
     except Exception as e:
         print(f"Error fetching groups: {e}")
         return jsonify({"error": "Failed to fetch groups"}), 500
@@ -323,8 +310,7 @@ def return_groups():
 @main_bp.route('/returnMyGroups', methods=['GET'])
 @jwt_required()
 def returnMyGroups():
-    username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["groups"])
     if not user:
         return jsonify({"error": "User not found"}), 404
 
@@ -332,28 +318,30 @@ def returnMyGroups():
     try:
         # Convert group_ids to ObjectId if they are not already
         group_ids = [ObjectId(group_id) if not isinstance(group_id, ObjectId) else group_id for group_id in group_ids]
-        group_list = mongo.db.groups.find({"_id": {"$in": group_ids}})
-        groups_to_be_returned = []
-        for group in group_list:
-            groups_to_be_returned.append({
-                "_id": str(group["_id"]),  # Convert ObjectId to string
-                "name": group["groupName"],
-                "description": group["groupDescription"],
-                "createdBy": group["createdBy"],
-                "users": [str(user_id) for user_id in group["users"]],  # Convert each user_id to string
-                "project_content": group["project_content"],
-                "comment_json": group.get("comment_json", {}),  # Include comment_json or an empty JSON object
-                "created_at": group["created_at"],
-                "projects": [str(project_id) for project_id in group.get("projects", [])]  # Convert project ObjectId to string
-            })
-        #print('RETURNMYGROUPS groups_to_be_returned: ', groups_to_be_returned)
-        print('/RETURNMYGROUPS here is groups_to_be_returned: ', groups_to_be_returned)
-        groups_to_be_returned = convert_objectid_to_str(groups_to_be_returned)
-        return jsonify(groups_to_be_returned), 200
+        groups = list(mongo.db.groups.aggregate(group_summary_pipeline({"_id": {"$in": group_ids}})))
+        return jsonify(groups), 200
     except Exception as e:
         print(f"Error fetching groups: {e}")
         return jsonify({"error": "Failed to fetch groups"}), 500
 
+
+@main_bp.route('/group/<group_id>', methods=['GET'])
+@jwt_required()
+def return_group_detail(group_id):
+    try:
+        group_id = ObjectId(group_id)
+        fields = parse_group_fields(request.args.get('fields'))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        groups = list(mongo.db.groups.aggregate(group_detail_pipeline(group_id, fields)))
+        if not groups:
+            return jsonify({"error": "Group not found"}), 404
+        return jsonify(groups[0]), 200
+    except Exception as e:
+        print(f"Error fetching group: {e}")
+        return jsonify({"error": "Failed to fetch group"}), 500
+
 @main_bp.route('/updateCommentJson', methods=['POST'])
 @jwt_required()
 def update_comment_json():
@@ -372,7 +360,7 @@ def update_comment_json():
     try:
         mongo.db.groups.update_one(
             {"_id": group_id},
-            {"$set": {"comment_json": comment_json}}
+            {"$set": {"comment_json": comment_json, "last_activity": datetime.datetime.now(datetime.timezone.utc)}}
         )
         return jsonify({"message": "Successfully updated comment_json"}), 200
     except Exception as e:
@@ -412,26 +400,23 @@ def return_user_projects():
         return jsonify({"error": str(e)}), 500
 
 
-# Function to summarize text using OpenAI
-def summarize_text_for_sign(text):
+
+@main_bp.route('/llmCacheStats', methods=['GET'])
+@jwt_required()
+def llm_cache_stats():
     try:
-        print('Got to summarize text')
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant. Please do not include headers like 'Summary:' when summarizing content."},
-                {"role": "user", "content": f"For the following resume, please write a concise (less than 100 words) bio for this person in the first person, also provide lists for suggested interests, suggested skills, a string for their latest university, a string for major, and a string for graduation year. If there are projects on the resume, also include the title of the project and its description. Please always format your response as a json with keys: bio, skills, interests, latestUniversity, major, grad_yr, projects (with contents title and desc). This is very important: the entirety of your response should constitute a valid JSON. There should be no json tags in the front or any leading/trailing text. Only give the json.  Here is the text:\n\n{text}"}
-            ],
-            max_tokens=600,
-            n=1,
-            stop=None,
-            temperature=0.5
-        )
-        print(f'Here is the response {response}')
-        return response.choices[0].message['content'].strip()
+        return jsonify(cache_stats()), 200
     except Exception as e:
-        print(f"Error summarizing text: {e}")
-        return ""
+        print(f"Error fetching LLM cache stats: {e}")
+        return jsonify({"error": "Unable to fetch LLM cache stats"}), 500
+
+
+# Per-process: each gunicorn worker reports its own client.
+@main_bp.route('/llmMetrics', methods=['GET'])
+@jwt_required()
+def llm_metrics():
+    return jsonify(get_llm_client().metrics()), 200
+
 
 # Route for resume parsing
 @main_bp.route('/resumeParser', methods=['POST', 'OPTIONS'])
@@ -448,11 +433,48 @@ def resume_parser():
         summary = summarize_text_for_sign(file_text)
         print(f'here is the summary: {summary}')
         return jsonify({'summary': summary}), 200
+    except LLMUnavailable as e:
+        print(f"LLM unavailable for resume parse: {e}")
+        return jsonify({'error': 'Resume parsing is temporarily unavailable'}), 503
     except Exception as e:
         print(f"Error parsing resume: {e}")
         return jsonify({'error': 'Failed to parse resume'}), 500
 
 
+# Queue resume parsing instead of holding a worker for the LLM round trip;
+# poll /parserJob/<job_id> for the result.
+@main_bp.route('/resumeParserJob', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def resume_parser_job():
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'}), 200
+    data = request.get_json()
+    if not data or 'resumeText' not in data:
+        return jsonify({'error': 'No resume text provided'}), 400
+    try:
+        verify_jwt_in_request(optional=True)
+        job_id = submit_job('resume', {'resumeText': data['resumeText']}, owner=get_jwt_identity())
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    except Exception as e:
+        print(f"Error queueing resume parse: {e}")
+        return jsonify({'error': 'Failed to queue resume parse'}), 500
+
+
+# job_id is the unguessable handle returned when the job was queued.
+@main_bp.route('/parserJob/<job_id>', methods=['GET'])
+@cross_origin()
+def parser_job(job_id):
+    verify_jwt_in_request(optional=True)
+    try:
+        job = find_job(mongo.db, job_id, owner=get_jwt_identity())
+    except Exception as e:
+        print(f"Error fetching parse job: {e}")
+        return jsonify({"error": "Unable to fetch job"}), 500
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_status(job)), 200
+
+
 @main_bp.route('/')
 def hello():
     return 'This 1 Message Means that heroku is running correctly!'
@@ -467,16 +489,6 @@ def generate_unique_key():
     unique_key = sha256_hash[:16]
     return unique_key
 
-def convert_objectid_to_str(data):
-    if isinstance(data, list):
-        return [convert_objectid_to_str(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: convert_objectid_to_str(value) for key, value in data.items()}
-    elif isinstance(data, ObjectId):
-        return str(data)
-    else:
-        return data
-
 
 # Route to create access key
 
@@ -523,13 +535,19 @@ def join_waiting_list():
     mongo.db.waiting_list.insert_one({
         "email": email,
         "full_name": full_name,
-        "timestamp": datetime.datetime.utcnow()
+        "timestamp": datetime.datetime.now(datetime.timezone.utc)
     })
     return jsonify({"message": "Email added to waiting list"}), 201
 
 
 from bson import ObjectId
 
+def password_hasher_busy():
+    response = jsonify({"error": "Password service is busy, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @main_bp.route('/SignUp', methods=['POST', 'OPTIONS'])
 def register():
     if request.method == 'OPTIONS':
@@ -542,82 +560,83 @@ def register():
 
     data = request.get_json()
     password = data.get('password')
-    email = data.get('email')
     username = data.get('username')
     major = data.get('major')  # Get the user's major from the request data
 
-    if not mongo.db.users.find_one({"email": email}):
-        hashed_password = generate_password_hash(password)
-        data['password'] = str(hashed_password)
-        result = mongo.db.users.insert_one(data)
-        user = mongo.db.users.find_one({"_id": result.inserted_id})
-        user_details = get_user_context_details(user)
-        user_details['_id'] = str(user['_id'])
-        user['_id'] = str(user['_id'])
-        access_token = create_access_token(identity=username, additional_claims=user_details)
-
-        # Check if a group with the user's major exists
-        group = mongo.db.groups.find_one({"groupName": major})
-        if group:
-            # Add user to the existing group
-            mongo.db.groups.update_one(
-                {"_id": ObjectId(group['_id'])},
-                {"$push": {"users": ObjectId(user['_id'])}}
-            )
-            updated_group = mongo.db.groups.find_one({"_id": ObjectId(group['_id'])})
-            print(f"User {user['_id']} added to group {group['_id']}. Updated group: {updated_group}")
+    try:
+        hashed_password = hash_password(password)
+    except PasswordHasherBusy:
+        return password_hasher_busy()
 
-            mongo.db.users.update_one(
-                {"_id": ObjectId(user['_id'])},
-                {"$push": {"groups": ObjectId(group['_id'])}}
-            )
-            updated_user = mongo.db.users.find_one({"_id": ObjectId(user['_id'])})
-            print(f"Group {group['_id']} added to user {user['_id']}. Updated user: {updated_user}")
-        else:
-            # Create a new group with the user's major as the group name
-            new_group = {
-                'groupName': major,
-                'groupDescription': f'Group for {major} majors',
-                'createdBy': username,
-                'users': [ObjectId(user['_id'])],
-                'project_content': {},
-                'comment_json': {'General Discussion': []},  # Initialize as an array
-                'projects': [],
-                'created_at': datetime.datetime.utcnow(),
-            }
-            group_insert_result = mongo.db.groups.insert_one(new_group)
-            group_id = group_insert_result.inserted_id
-
-            # Debugging: Print the new group ID
-            print(f"New group created with ID: {group_id}")
-
-            # Add the new group to the user's groups field
-            print(f"Before updating user's groups field: {user}")
-            mongo.db.users.update_one(
-                {"_id": ObjectId(result.inserted_id)},
-                {"$push": {"groups": ObjectId(group_id)}}
-            )
-            updated_user = mongo.db.users.find_one({"_id": ObjectId(user['_id'])})
-            print(f"Group {group_id} added to user {user['_id']}. Updated user: {updated_user}")
+    # The user's id is chosen up front so the major group can list the user
+    # before the user document exists: one upsert, then one insert.
+    user_id = ObjectId()
+    group = join_major_group(major, username, user_id) if major else None
 
-        response = jsonify({
-            "message": "User registered successfully",
-            "access_token": access_token,
-            "new_user": user
-        })
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        return response, 201
-    else:
+    user = dict(data, _id=user_id, password=str(hashed_password), groups=[group['_id']] if group else [])
+    try:
+        mongo.db.users.insert_one(user)
+    except DuplicateKeyError:
+        # The email is taken (unique index); undo the group membership.
+        if group:
+            mongo.db.groups.update_one({"_id": group['_id']}, {"$pull": {"users": user_id}})
         response = jsonify({'message': 'Email already exists'})
         response.headers.add('Access-Control-Allow-Origin', '*')
         return response, 409
 
+    index_user(user)
+    refresh_directory_entry(user_id)
+    user_details = get_user_context_details(user)
+    access_token = create_access_token(identity=username, additional_claims=user_details)
+    del user['password']
+    user['_id'] = str(user_id)
+    response = jsonify({
+        "message": "User registered successfully",
+        "access_token": access_token,
+        "new_user": user
+    })
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response, 201
+
+
+def join_major_group(major, username, user_id):
+    """Add ``user_id`` to the group for ``major``, creating the group if needed, in one round trip.
+
+    Two signups racing to create the same major group both try to insert; the
+    unique major_group_name index rejects the second, whose retry then finds
+    the first one's group.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    new_group_id = ObjectId()
+    update = {
+        "$setOnInsert": {
+            '_id': new_group_id,
+            'groupDescription': f'Group for {major} majors',
+            'createdBy': username,
+            'project_content': {},
+            'comment_json': {'General Discussion': []},  # Initialize as an array
+            'projects': [],
+            'created_at': now,
+            'major_group': True,
+        },
+        "$addToSet": {"users": user_id},
+        "$set": {"last_activity": now},
+    }
+    for attempt in range(2):
+        try:
+            group = mongo.db.groups.find_one_and_update(
+                {"groupName": major}, update, upsert=True,
+                projection={"groupName": 1}, return_document=ReturnDocument.AFTER,
+            )
+            break
+        except DuplicateKeyError:
+            if attempt:
+                raise
+    if group['_id'] == new_group_id:
+        index_group(group)
+    return group
 
 
-
-
-    
-
 #Dependent frontend code: UserContext.js
 @main_bp.route('/login', methods=['POST'])
 def login():
@@ -626,8 +645,13 @@ def login():
     email = data.get('email')
     password = data.get('password')
     user = mongo.db.users.find_one({"email": email})
-    if not user or not check_password_hash(user['password'], password):
-        return jsonify({"error": "Invalid email or password"}), 401
+    try:
+        if not user or not verify_password(user['password'], password):
+            return jsonify({"error": "Invalid email or password"}), 401
+    except PasswordHasherBusy:
+        return password_hasher_busy()
+    if needs_rehash(user['password']):
+        rehash_in_background(mongo.db, user['_id'], user['password'], password)
     user_details = get_user_context_details(user)
     user_details = {key: str(value) if isinstance(value, ObjectId) else value for key, value in user_details.items()}
     access_token = create_access_token(identity=user['username'], additional_claims=user_details)
@@ -640,7 +664,7 @@ def login():
 def edit_student_profile():
     print('accessing studentProfileEditor route')
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -656,17 +680,23 @@ def edit_student_profile():
         }}
         
         if 'password' in update_data:
-            update_data['password'] = generate_password_hash(update_data['password'])
+            try:
+                update_data['password'] = hash_password(update_data['password'])
+            except PasswordHasherBusy:
+                return password_hasher_busy()
 
         # Update the user in the database
         mongo.db.users.update_one({"username": username}, {"$set": update_data})
         user.update(update_data)
+        if 'username' in update_data or 'skills' in update_data:
+            index_user(user)
         if 'username' in update_data and update_data['username'] != username:
             user_details = get_user_context_details(user)
             user_details = {key: str(value) if isinstance(value, ObjectId) else value for key, value in user_details.items()}
             access_token = create_access_token(identity=update_data['username'], additional_claims=user_details)
         else:
             access_token = None
+        refresh_directory_entry(user['_id'])
 
         return jsonify({
             'message': 'Profile updated successfully',
@@ -678,7 +708,6 @@ def edit_student_profile():
     project_ids = [ObjectId(project_id) for project_id in portfolio]
     projects = list(mongo.db.projects.find({"_id": {"$in": project_ids}}))
     user_details['portfolio'] = projects
-    user_details = convert_objectid_to_str(user_details)
     return jsonify(user_details), 200
 
 
@@ -691,7 +720,7 @@ def edit_student_profile():
 @jwt_required()
 def massProjectPublish():
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -699,35 +728,76 @@ def massProjectPublish():
     data = request.get_json()
     if not data or 'selectedPortfolio' not in data:
         return jsonify({"error": "Invalid data"}), 422
+    if not isinstance(data['selectedPortfolio'], list):
+        return jsonify({"error": "selectedPortfolio must be a list"}), 400
 
     user_id = user['_id']
 
-    project_ids = []
-    for project in data['selectedPortfolio']:
+    # Build every project with its _id up front: one insert_many, one $push.
+    now = datetime.datetime.now(datetime.timezone.utc)
+    new_projects, indexes, errors = [], [], []
+    for index, project in enumerate(data['selectedPortfolio']):
+        if not isinstance(project, dict):
+            errors.append({"index": index, "error": "Project must be an object"})
+            continue
         new_project = {
+            '_id': ObjectId(),
             'projectName': project.get('projectName', ''),
             'projectDescription': project.get('projectDescription', ''),
             'createdBy': username,
             'upvotes': [],
             'layers': [],
             'links': [],
-            'created_at': datetime.datetime.utcnow(),
+            'created_at': now,
+            'hot_score': hot_score(0, 0, now),
         }
-
-        proj_insert_result = mongo.db.projects.insert_one(new_project)
-        project_id = proj_insert_result.inserted_id
-        project_ids.append(project_id)
-
-    user_update_result = mongo.db.users.update_one(
-        {"_id": user['_id']},
-        {"$push": {"portfolio": {"$each": project_ids}}}
-    )
-
-    if user_update_result.modified_count == 0:
-        return jsonify({"error": "Failed to update user portfolio"}), 500
-
-    return jsonify({"message": "Projects published successfully"}), 200
-    
+        new_projects.append(new_project)
+        indexes.append(index)
+
+    # ordered=False: one bad project does not stop the others, and each
+    # failure is reported against its index in selectedPortfolio.
+    failed = set()
+    if new_projects:
+        try:
+            mongo.db.projects.insert_many(new_projects, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed.add(write_error['index'])
+                errors.append({"index": indexes[write_error['index']], "error": write_error.get('errmsg', 'Insert failed')})
+        except Exception as e:
+            print(f"Error publishing projects: {e}")
+            return jsonify({"error": "Failed to publish projects"}), 500
+    published = [new_project for position, new_project in enumerate(new_projects) if position not in failed]
+    project_ids = [new_project['_id'] for new_project in published]
+
+    if project_ids:
+        try:
+            pushed = mongo.db.users.update_one(
+                {"_id": user_id},
+                {"$push": {"portfolio": {"$each": project_ids}}}
+            ).modified_count == 1
+        except Exception as e:
+            print(f"Error updating portfolio: {e}")
+            pushed = False
+        if not pushed:
+            # Don't leave projects that no portfolio points to.
+            try:
+                mongo.db.projects.delete_many({"_id": {"$in": project_ids}})
+            except Exception as e:
+                print(f"Error removing unlisted projects {project_ids}: {e}")
+            return jsonify({"error": "Failed to update user portfolio"}), 500
+        for new_project in published:
+            index_project(new_project)
+        refresh_directory_entry(user_id)
+
+    errors.sort(key=lambda error: error["index"])
+    if errors and not project_ids:
+        return jsonify({"error": "No projects were published", "errors": errors}), 422
+    return jsonify({
+        "message": "Projects published successfully",
+        "published": project_ids,
+        "errors": errors,
+    }), 200
 
 
 @main_bp.route('/addBlocProject', methods=['POST'])
@@ -750,12 +820,12 @@ def add_bloc_project():
                 "links": project_data.get('links'),
                 "projectDescription": project_data.get('projectDescription'),
                 "layers": project_data.get('layers'),
-                "updated_at": datetime.datetime.utcnow()
+                "updated_at": datetime.datetime.now(datetime.timezone.utc)
             }}
         )
         if update_result.modified_count == 1:
             updated_project = mongo.db.projects.find_one({"_id": ObjectId(project_id)})
-            updated_project = convert_objectid_to_str(updated_project)  # Use your function
+            index_project(updated_project)
             print('here is the project getting sent up, ', updated_project)
 
             return jsonify(updated_project), 200
@@ -771,18 +841,19 @@ def add_bloc_project():
             'upvotes': [],
             "projectDescription": project_data.get('projectDescription'),
             "layers": project_data.get('layers'),
-            "created_at": datetime.datetime.utcnow()
+            "created_at": datetime.datetime.now(datetime.timezone.utc)
         }
+        new_project['hot_score'] = hot_score(0, 0, new_project['created_at'])
         result = mongo.db.projects.insert_one(new_project)
+        index_project(new_project)
         print('here is the result: ', result)
         print('here is the project getting sent up, ', new_project)
         if result.acknowledged:
             print('got passed the result.acknowleged')
             project_id = str(result.inserted_id)
             new_project["_id"] = project_id
-            new_project = convert_objectid_to_str(new_project) 
             # Log the user document to debug the update issue
-            user = mongo.db.users.find_one({"username": username})
+            user = get_current_user(["_id"])
             print('User found for update:', user)
             if not user:
                 print('User not found in the database')
@@ -794,6 +865,7 @@ def add_bloc_project():
             )
             print('update_result: ', update_result)
             if update_result.modified_count == 1:
+                refresh_directory_entry(user['_id'])
                 return jsonify(new_project), 201
             else:
                 print('couldnt process the update')
@@ -804,44 +876,7 @@ def add_bloc_project():
 
 
 
-# Function to summarize text using OpenAI
-def summarize_text_description_title_tags(text):
-    try:
-        print('Got to summarize_text_description_title_tags')
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant. Please do not include headers like 'Summary:' when summarizing content."},
-                {"role": "user", "content": f"For the following file, please write a concise (less than 100 words) description for this project. Also, provide a list for suggested tags concerning general topics the file is about (tags like: machine learning, computer vision, NLP, robotics, genomics, etc). Lastly please provide a string name for this project. Please always format your response as a json with keys: name, tags, description. This is very important: the entirety of your response should constitute a valid JSON. There should be no json tags in the front or any leading/trailing text. Only give the json.  Here is the text:\n\n{text}"}            ],
-            max_tokens=600,
-            n=1,
-            stop=None,
-            temperature=0.5
-        )
-        return response.choices[0].message['content'].strip()
-    except Exception as e:
-        print(f"Error summarizing text: {e}")
-        return ""
     
-# Function to summarize text using OpenAI
-def summarize_text_layers(text):
-    try:
-        print('Got to summarize_text_layers')
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant. Please do not include headers like 'Summary:' when summarizing content."},
-                {"role": "user", "content": f"I need to create a project page by summarizing the following text into multiple self-contained sections. Each section should be around 3 sentences. Make as many sections as necessary. These sections will explain the project in detail when viewed together. Please ensure that the entirety of your response is formatted as a valid JSON array with each paragraph as an object containing 'index' and 'content' keys. Do not include any additional text outside of the JSON array. There should be no json tags in the front or any leading/trailing text. Only give the json. THERE SHOULD BE NO: ```json in the response.   Here is the text:\n\n{text}"}
-            ],
-            max_tokens=600,
-            n=1,
-            stop=None,
-            temperature=0.5
-        )
-        return response.choices[0].message['content'].strip()
-    except Exception as e:
-        print(f"Error summarizing text: {e}")
-        return ""
 
 # Route for resume parsing
 @main_bp.route('/projectFileParser', methods=['POST', 'OPTIONS'])
@@ -855,15 +890,81 @@ def projectFileParser():
         return jsonify({'error': 'No fileText provided'}), 400
     file_text = data['fileText']
     try:
-        surrounding_summary = summarize_text_description_title_tags(file_text)
-        summary_content = summarize_text_layers(file_text)
-        print(f'here is the summary_content: {summary_content}')
-        return jsonify({'surrounding_summary': surrounding_summary, 'summary_content': summary_content}), 200
+        results, errors = summarize_concurrently({
+            'surrounding_summary': (summarize_text_description_title_tags, file_text),
+            'summary_content': (summarize_text_layers, file_text),
+        })
+        print(f'here is the summary_content: {results["summary_content"]}')
+        if errors:
+            print(f"Partial proj file parse: {errors}")
+            results['errors'] = errors
+        status = 502 if len(errors) == 2 else 200
+        return jsonify(results), status
+    except LLMUnavailable as e:
+        print(f"LLM unavailable for proj file parse: {e}")
+        return jsonify({'error': 'Project file parsing is temporarily unavailable'}), 503
     except Exception as e:
         print(f"Error parsing proj file: {e}")
         return jsonify({'error': 'Failed to parse proj file'}), 500
 
 
+# Streaming variant of /projectFileParser: each layer is sent as a
+# Server-Sent Event ("layer") as soon as it has been generated, followed by
+# "surrounding_summary" when that completes and a final "done".
+@main_bp.route('/projectFileParserStream', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def project_file_parser_stream():
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'}), 200
+    data = request.get_json()
+    if not data or 'fileText' not in data:
+        return jsonify({'error': 'No fileText provided'}), 400
+    file_text = data['fileText']
+
+    def events():
+        summary = submit_llm_task(summarize_text_description_title_tags, file_text)
+        layer_count = 0
+        try:
+            for layer in stream_text_layers(file_text):
+                layer_count += 1
+                yield 'layer', layer
+                if summary is not None and summary.done():
+                    yield summary_event(summary)
+                    summary = None
+        except Exception as e:
+            print(f"Error streaming proj file layers: {e}")
+            yield 'error', {'stage': 'summary_content', 'error': str(e)}
+        if summary is not None:
+            yield summary_event(summary)
+        yield 'done', {'layers': layer_count}
+
+    def summary_event(summary):
+        try:
+            return 'surrounding_summary', summary.result(timeout=app.config['LLM_TIMEOUT_SECONDS'])
+        except Exception as e:
+            print(f"Error parsing proj file summary: {e}")
+            return 'error', {'stage': 'surrounding_summary', 'error': str(e) or 'Timed out'}
+
+    return stream_events(events())
+
+
+@main_bp.route('/projectFileParserJob', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def project_file_parser_job():
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'OK'}), 200
+    data = request.get_json()
+    if not data or 'fileText' not in data:
+        return jsonify({'error': 'No fileText provided'}), 400
+    try:
+        verify_jwt_in_request(optional=True)
+        job_id = submit_job('project_file', {'fileText': data['fileText']}, owner=get_jwt_identity())
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    except Exception as e:
+        print(f"Error queueing proj file parse: {e}")
+        return jsonify({'error': 'Failed to queue proj file parse'}), 500
+
+
 @main_bp.route('/deleteProject', methods=['DELETE'])
 @jwt_required()
 def delete_project():
@@ -884,6 +985,7 @@ def delete_project():
     project_delete_result = mongo.db.projects.delete_one({"_id": project_object_id})
     if project_delete_result.deleted_count != 1:
         return jsonify({"error": "Failed to delete the project from the projects collection"}), 500
+    unindex_project(project_object_id)
 
     # Remove the project ID from the user's portfolio
     user_update_result = mongo.db.users.update_one(
@@ -893,6 +995,7 @@ def delete_project():
     if user_update_result.modified_count != 1:
         return jsonify({"error": "Failed to update the user's portfolio"}), 500
 
+    refresh_directory_entry(user_object_id)
     return jsonify({"message": "Project deleted successfully"}), 200
 
 
@@ -902,7 +1005,7 @@ def delete_project():
 @jwt_required()
 def update_project(project_name):
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["portfolio"])
     if not user:
         return jsonify({"error": "User not found"}), 404
     data = request.get_json()
@@ -914,6 +1017,7 @@ def update_project(project_name):
     for key in data:
         user['portfolio'][project_index][key] = data[key]
     mongo.db.users.update_one({"username": username}, {"$set": {"portfolio": user['portfolio']}})
+    refresh_directory_entry(user['_id'])
     return jsonify({'message': 'Project updated successfully'}), 200
 
 
@@ -926,7 +1030,7 @@ def update_project_by_id_field(project_id, project_field):
     data = request.get_json()
     if not data or project_field not in data:
         return jsonify({"error": "Invalid data"}), 422
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
     if not user:
         return jsonify({"error": "User not found"}), 404
     project = mongo.db.projects.find_one({"_id": ObjectId(project_id)})
@@ -939,7 +1043,8 @@ def update_project_by_id_field(project_id, project_field):
         {"$set": {project_field: data[project_field]}}
     )
     updated_project = mongo.db.projects.find_one({"_id": ObjectId(project_id)})
-    updated_project = convert_objectid_to_str(updated_project)
+    if project_field in ('projectName', 'tags'):
+        index_project(updated_project)
     return jsonify(updated_project), 200
 
 
@@ -959,27 +1064,12 @@ def student_profile():
         response.status_code = 404
         return response
     
-    portfolio = user.get('portfolio', [])
-    project_ids = [ObjectId(project_id) for project_id in portfolio]
-    logging.debug(f"Project IDs: {project_ids}")
-
-    projects = list(mongo.db.projects.find({"_id": {"$in": project_ids}}))
+    projects = load_portfolio_with_comments(user)
     logging.debug(f"Projects found: {projects}")
 
-    for project in projects:
-        comment_ids = [ObjectId(comment_id) for comment_id in project.get('comments', [])]
-        comments = list(mongo.db.comments.find({"_id": {"$in": comment_ids}}))
-        for comment in comments:
-            author = mongo.db.users.find_one({"_id": comment.get("author_id")})
-            if author:
-                comment["author"] = author["username"]
-        comments = [convert_objectid_to_str(comment) for comment in comments]
-        project["comments"] = comments
-    projects = [convert_objectid_to_str(project) for project in projects]
     user_details = get_user_details(user)
     user_details['portfolio'] = projects
-    user_details = convert_objectid_to_str(user_details)
-    
+
     logging.debug(f"User details: {user_details}")
 
     return jsonify(user_details)
@@ -1019,16 +1109,17 @@ def handle_comment(username):
             {"_id": ObjectId(project_id)},
             {"$push": {"comments": new_comment["_id"]}}
         )
+        refresh_hot_score(mongo.db, ObjectId(project_id))
         mongo.db.users.update_one(
             {"_id": author['_id']},
             {"$push": {"comments": new_comment["_id"]}}
         )
 
+        refresh_directory_entry(author['_id'])
+
         project = mongo.db.projects.find_one({"_id": ObjectId(project_id)})
         comment_ids = project.get('comments', [])
         comments = list(mongo.db.comments.find({"_id": {"$in": comment_ids}}))
-        project = convert_objectid_to_str(project)
-        comments = [convert_objectid_to_str(comment) for comment in comments]
 
         return jsonify({"project": project, "comments": comments}), 200
 
@@ -1044,9 +1135,20 @@ def handle_comment(username):
 @jwt_required()
 def get_directory_info():
     try:
-        users = mongo.db.users.find()
-        directory = [get_user_details(user) for user in users]
-        return jsonify(convert_objectid_to_str(directory)), 200
+        page = parse_page(request.args.get('page')) if 'page' in request.args else None
+        limit = parse_page_size(request.args.get('limit'), DIRECTORY_PAGE_SIZE, DIRECTORY_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        snapshot = get_directory_snapshot()
+        if page is None:
+            body = snapshot.iter_json()
+        else:
+            start = (page - 1) * limit
+            body = snapshot.iter_json(start, start + limit)
+        response = Response(body, mimetype='application/json')
+        response.headers['X-Total-Count'] = str(snapshot.count)
+        return response, 200
     except Exception as e:
         print(f"Error fetching directory info: {e}")
         return jsonify({"error": "Unable to fetch directory info"}), 500
@@ -1056,19 +1158,14 @@ def get_directory_info():
 @jwt_required()
 def user_filtered_search(value):
     try:
-        users = mongo.db.users.find({
-            "$or": [
-                {"username": {"$regex": value, "$options": "i"}},
-                {"skills": {"$elemMatch": {"$regex": value, "$options": "i"}}},
-                {"interests": {"$elemMatch": {"$regex": value, "$options": "i"}}},
-                {"user_type": {"$regex": value, "$options": "i"}},
-                {"email": {"$regex": value, "$options": "i"}},
-                {"biography": {"$regex": value, "$options": "i"}}
-            ]
-        })
+        page = parse_page(request.args.get('page'))
+        limit = parse_page_size(request.args.get('limit'), SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        users = text_search(mongo.db.users, value, USER_SEARCH_PROJECTION, USER_PREFIX_FIELDS, page, limit)
         directory = [get_user_feed_details(user) for user in users]
-        response_data = convert_objectid_to_str(directory)
-        return jsonify(response_data), 200
+        return jsonify(directory), 200
     except Exception as e:
         print(f"Error fetching directory info: {e}")
         return jsonify({"error": "Unable to fetch directory info"}), 500
@@ -1078,18 +1175,37 @@ def user_filtered_search(value):
 @jwt_required()
 def project_filtered_search(value):
     try:
-        projects = mongo.db.projects.find({"$or": [
-            {"createdBy": {"$regex": value, "$options": "i"}},
-            {"projectName": {"$regex": value, "$options": "i"}},
-            {"projectDescription": {"$regex": value, "$options": "i"}}
-        ]})
+        page = parse_page(request.args.get('page'))
+        limit = parse_page_size(request.args.get('limit'), SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        projects = text_search(mongo.db.projects, value, PROJECT_SEARCH_PROJECTION, PROJECT_PREFIX_FIELDS, page, limit)
         directory = [get_project_feed_details(project) for project in projects]
-        response_data = convert_objectid_to_str(directory)
-        return jsonify(response_data), 200
+        return jsonify(directory), 200
     except Exception as e:
         print(f"Error fetching directory info: {e}")
         return jsonify({"error": "Unable to fetch directory info"}), 500
 
+@main_bp.route('/suggest', methods=['GET'])
+@jwt_required()
+def suggest():
+    prefix = request.args.get('q', '')
+    types = request.args.get('types')
+    try:
+        limit = parse_page_size(request.args.get('limit'), SUGGEST_LIMIT, SUGGEST_MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if types:
+        types = set(types.split(','))
+        if not types <= set(SUGGEST_TYPES):
+            return jsonify({"error": f"types must be drawn from {', '.join(SUGGEST_TYPES)}"}), 400
+    try:
+        return jsonify(get_suggest_index().search(prefix, limit, types)), 200
+    except Exception as e:
+        print(f"Error fetching suggestions: {e}")
+        return jsonify({"error": "Unable to fetch suggestions"}), 500
+
 #Dependent frontend: OtherStudentProfile.js
 
 @main_bp.route('/profile/<username>', methods=['GET'])
@@ -1098,22 +1214,9 @@ def other_student_profile(username):
     user = mongo.db.users.find_one({"username": username})
     if not user:
         return jsonify({"error": "User not found"}), 404
-    portfolio = user.get('portfolio', [])
-    project_ids = [ObjectId(project_id) for project_id in portfolio]
-    projects = list(mongo.db.projects.find({"_id": {"$in": project_ids}}))
-    for project in projects:
-        comment_ids = [ObjectId(comment_id) for comment_id in project.get('comments', [])]
-        comments = list(mongo.db.comments.find({"_id": {"$in": comment_ids}}))
-        for comment in comments:
-            author = mongo.db.users.find_one({"_id": comment.get("author_id")})
-            if author:
-                comment["author"] = author["username"]
-        comments = [convert_objectid_to_str(comment) for comment in comments]
-        project["comments"] = comments
-    projects = [convert_objectid_to_str(project) for project in projects]
+    projects = load_portfolio_with_comments(user)
     user_details = get_user_details(user)
     user_details['portfolio'] = projects
-    user_details = convert_objectid_to_str(user_details)
     return jsonify(user_details), 200
 
 
@@ -1121,7 +1224,7 @@ def other_student_profile(username):
 
 @main_bp.route('/injectSampleData', methods=['POST'])
 def inject_sample_data():
-    for user in sample_users:
+    for user in build_sample_users():
         if not mongo.db.users.find_one({"username": user["username"]}):
             mongo.db.users.insert_one(user)
     return jsonify({"message": "Sample data injected successfully"}), 201
@@ -1136,6 +1239,9 @@ def migrate_projects():
         user_comment_ids = []
         for project in portfolio:
             project_copy = copy.deepcopy(project)
+            project_copy.setdefault('_id', ObjectId())
+            project_copy['created_at'] = as_created_at(project_copy.get('created_at'), project_copy['_id'].generation_time)
+            project_copy['hot_score'] = hot_score(len(project_copy.get('upvotes') or []), len(project_copy.get('comments') or []), project_copy['created_at'])
             result = mongo.db.projects.insert_one( project_copy )
             project_id = result.inserted_id
             
@@ -1164,59 +1270,64 @@ def populate_layers():
 @main_bp.route('/upvoteProject', methods=['POST'])
 @jwt_required()
 def upvote_project():
-    data = request.get_json()
-    user_id = ObjectId(data.get('user_id'))
-    project_id = ObjectId(data.get('project_id'))
-    app.logger.info(f"Received upvote request: user_id={user_id}, project_id={project_id}")
-
-    if not user_id:
-        return jsonify({"error": "User_id is required"}), 400
+    # The voter is always the token's user; a user_id in the body is ignored.
+    data = request.get_json(silent=True) or {}
+    if not data.get('project_id'):
+        return jsonify({"error": "project_id is required"}), 400
+    try:
+        project_id = ObjectId(data['project_id'])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    user = mongo.db.users.find_one({"_id": user_id})
+    user = get_current_user(["_id", "username"])
     if not user:
         return jsonify({"error": "User not found"}), 404
+    user_id = user['_id']
+    app.logger.info(f"Received upvote request: user_id={user_id}, project_id={project_id}")
 
-    username = user.get('username')
-    new_upvote = {
-        "project_id": project_id,
-        "user_id": user_id,
-        "author": username,
-    }
-    result = mongo.db.upvotes.insert_one(new_upvote)
-    if not result.acknowledged:
+    try:
+        new_upvote, created = add_upvote(mongo.cx, mongo.db, user_id, project_id, user['username'])
+    except UpvoteTargetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    if not new_upvote:
         app.logger.error("Failed to insert new upvote")
         return jsonify({"error": "Failed to insert new upvote"}), 500
 
-    new_upvote_id = result.inserted_id
-
-    update_project = mongo.db.projects.update_one(
-        {'_id': project_id},
-        {"$addToSet": {"upvotes": new_upvote_id}}
-    )
-
-    if update_project.modified_count == 0:
-        return jsonify({"error": "Project not updated"}), 404
+    if created:
+        refresh_directory_entry(user_id)
+        app.logger.info(f"Upvote successful: {new_upvote}")
+    return jsonify(dict(new_upvote, created=created)), 200
 
-    updated = mongo.db.users.update_one(
-        {"_id": user_id},
-        {"$addToSet": {"upvotes": new_upvote_id}}
-    )
 
-    if updated.modified_count == 0:
-        return jsonify({"error": "User not updated"}), 404
+@main_bp.route('/removeUpvote', methods=['POST'])
+@jwt_required()
+def remove_upvote_project():
+    data = request.get_json(silent=True) or {}
+    if not data.get('project_id'):
+        return jsonify({"error": "project_id is required"}), 400
+    try:
+        project_id = ObjectId(data['project_id'])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
 
-    new_upvote["_id"] = str(new_upvote_id)
-    new_upvote["project_id"] = str(new_upvote["project_id"])
-    new_upvote["user_id"] = str(new_upvote["user_id"])
+    user = get_current_user(["_id"])
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    try:
+        removed = remove_upvote(mongo.cx, mongo.db, user['_id'], project_id)
+    except UpvoteTargetNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    if not removed:
+        return jsonify({"message": "Project was not upvoted", "removed": False}), 200
 
-    app.logger.info(f"Upvote successful: {new_upvote}")
-    return jsonify(new_upvote), 200
+    refresh_directory_entry(user['_id'])
+    return jsonify({"message": "Upvote removed", "removed": True, "_id": removed['_id']}), 200
 
 @main_bp.route('/api/notifications')
 @jwt_required()
 def get_notifications():
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"], verify=False)
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -1237,7 +1348,7 @@ def get_notifications():
 @jwt_required()
 def mark_notification_read(notification_id):
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
     if not user:
         return jsonify({"error": "User not found"}), 404
 
@@ -1254,7 +1365,7 @@ def mark_notification_read(notification_id):
 @jwt_required()
 def create_notification():
     username = get_jwt_identity()
-    user = mongo.db.users.find_one({"username": username})
+    user = get_current_user(["_id"])
     if not user:
         return jsonify({"error": "User not found"}), 404
 
@@ -1263,7 +1374,7 @@ def create_notification():
         'user_id': user['_id'],
         'type': data['type'],
         'message': data['message'],
-        'created_at': datetime.datetime.utcnow(),
+        'created_at': datetime.datetime.now(datetime.timezone.utc),
         'is_read': False
     }
     result = mongo.db.notifications.insert_one(new_notification)
@@ -1274,20 +1385,51 @@ def create_notification():
 
 #Dependent frontend: RankedFeed.js, TagsFeed.js
 
+def stream_feed_page(sort_field, match=None, extra=None):
+    try:
+        limit = parse_page_size(request.args.get('limit'), app.config['FEED_PAGE_SIZE'], app.config['FEED_MAX_PAGE_SIZE'])
+        page = FeedPage(mongo.db, sort_field=sort_field, cursor=request.args.get('cursor'), limit=limit, match=match)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def suffix():
+        trailer = {"next_cursor": page.next_cursor}
+        trailer.update(extra or {})
+        return ', ' + app.json.dumps(trailer)[1:]
+
+    return stream_json_array(page, prefix='{"projects": ', suffix=suffix)
+
+
 @main_bp.route('/returnFeed', methods=['GET'])
 @jwt_required()
 def returnFeed():
-    username = get_jwt_identity()
-    projects = list(mongo.db.projects.find())
+    return stream_feed_page('created_at')
+
+
+#Dependent frontend: RankedFeed.js
+
+@main_bp.route('/returnRankedFeed', methods=['GET'])
+@jwt_required()
+def returnRankedFeed():
+    return stream_feed_page('hot_score')
 
-    for project in projects:
-        comment_ids = [ObjectId(comment_id) for comment_id in project.get('comments', [])]
-        comments = list(mongo.db.comments.find({"_id": {"$in": comment_ids}}))
-        comments = [convert_objectid_to_str(comment) for comment in comments]
-        project["comments"] = comments
-    projects = [convert_objectid_to_str(project) for project in projects]
 
-    return json_util.dumps(projects), 200 
+
+#Dependent frontend: TagsFeed.js
+
+@main_bp.route('/tagFeed', methods=['GET'])
+@jwt_required()
+def tagFeed():
+    tags = [tag for tag in request.args.get('tags', '').split(',') if tag]
+    try:
+        match = tag_match(tags, request.args.get('mode', 'and'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    extra = None
+    if not request.args.get('cursor'):
+        # Facet counts describe the whole result set, so only the first page carries them.
+        extra = {"facets": tag_facets(mongo.db, tags, match)}
+    return stream_feed_page('created_at', match=match, extra=extra)
 
 
 
@@ -1303,8 +1445,7 @@ def return_projects():
         project = mongo.db.projects.find_one({"_id": ObjectId(upvote["project_id"])})
         if project:
             projects.append(project)
-    projects = [convert_objectid_to_str(project) for project in projects]
-    return json_util.dumps(projects), 200
+    return jsonify(projects), 200
 
 
 
@@ -2,20 +2,8 @@
 
 
 
-from bson import ObjectId
 
 def get_user_details(user):
-    def convert_objectid_to_str(data):
-        if isinstance(data, list):
-            return [convert_objectid_to_str(item) for item in data]
-        elif isinstance(data, dict):
-            return {key: convert_objectid_to_str(value) for key, value in data.items()}
-        elif isinstance(data, ObjectId):
-            return str(data)
-        else:
-            return data
-
-
     if not user:
         return None
     user_details = {
@@ -40,20 +28,10 @@ def get_user_details(user):
         "resume": user.get('resume', ''),
         "groups": user.get('groups', [])
     }
-    return convert_objectid_to_str(user_details)
+    return user_details
 
 
 def get_user_context_details(user):
-    def convert_objectid_to_str(data):
-        if isinstance(data, list):
-            return [convert_objectid_to_str(item) for item in data]
-        elif isinstance(data, dict):
-            return {key: convert_objectid_to_str(value) for key, value in data.items()}
-        elif isinstance(data, ObjectId):
-            return str(data)
-        else:
-            return data
-        
     if not user:
         return None
     user_details = {
@@ -61,22 +39,12 @@ def get_user_context_details(user):
         "username": user.get('username', ''),
         "university": user.get('university', ''),
         "user_type": user.get('user_type', ''),
-        "upvotes": user.get('upvotes', []),
+        "upvotes": [str(upvote_id) for upvote_id in user.get('upvotes', [])],
     }
-    return convert_objectid_to_str(user_details)
+    return user_details
 
 
 def get_user_feed_details(user):
-    def convert_objectid_to_str(data):
-        if isinstance(data, list):
-            return [convert_objectid_to_str(item) for item in data]
-        elif isinstance(data, dict):
-            return {key: convert_objectid_to_str(value) for key, value in data.items()}
-        elif isinstance(data, ObjectId):
-            return str(data)
-        else:
-            return data
-        
     if not user:
         return None
     user_details = {
@@ -89,7 +57,7 @@ def get_user_feed_details(user):
         "user_type": user.get('user_type', ''),
         "portfolio": user.get('portfolio', ''),
     }
-    return convert_objectid_to_str(user_details)
+    return user_details
 
 def get_portfolio_details(user):
     if not user:
@@ -106,6 +74,7 @@ def get_project_details(project):
         "comments": project.get('comments', []),
         "created_by": project.get('createdBy', ''),
         "upvotes": project.get('upvotes', []),
+        "upvote_count": project.get('upvote_count', len(project.get('upvotes', []))),
         "projectDescription": project.get('projectDescription', ''),
         "projectName": project.get('projectName', ''),
         "tags": project.get('tags', []),
@@ -113,23 +82,14 @@ def get_project_details(project):
 
 
 def get_project_feed_details(project):
-    def convert_objectid_to_str(project):
-        if isinstance(project, list):
-            return [convert_objectid_to_str(item) for item in project]
-        elif isinstance(project, dict):
-            return {key: convert_objectid_to_str(value) for key, value in project.items()}
-        elif isinstance(project, ObjectId):
-            return str(project)
-        else:
-            return project
-        
     if not project:
         return None
     return {
         "_id": str(project.get('_id', '')),
         "createdBy": project.get('createdBy', ''),
         "upvotes": project.get('upvotes', []),
+        "upvote_count": project.get('upvote_count', len(project.get('upvotes', []))),
         "projectDescription": project.get('projectDescription', ''),
         "projectName": project.get('projectName', ''),
         "tags": project.get('tags', []),
-    }
\ No newline at end of file
+    }
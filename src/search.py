@@ -0,0 +1,84 @@
+import re
+from pymongo import TEXT
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Text index definitions, created by `flask create-indexes`. Mongo keeps the
+# inverted index up to date on every insert/update, so writes need no extra
+# bookkeeping here.
+USER_SEARCH_INDEX = {
+    "keys": [("username", TEXT), ("skills", TEXT), ("interests", TEXT), ("biography", TEXT)],
+    "weights": {"username": 10, "skills": 5, "interests": 5, "biography": 1},
+    "name": "user_search",
+}
+PROJECT_SEARCH_INDEX = {
+    "keys": [("projectName", TEXT), ("tags", TEXT), ("createdBy", TEXT), ("projectDescription", TEXT)],
+    "weights": {"projectName": 10, "tags": 5, "createdBy": 3, "projectDescription": 1},
+    "name": "project_search",
+}
+
+USER_SEARCH_PROJECTION = {
+    "username": 1, "email": 1, "interests": 1, "orgs": 1,
+    "university": 1, "user_type": 1, "portfolio": 1,
+}
+PROJECT_SEARCH_PROJECTION = {
+    "createdBy": 1, "upvotes": 1, "upvote_count": 1, "projectDescription": 1, "projectName": 1, "tags": 1,
+}
+
+# Fields searched word-prefix by word-prefix when $text finds nothing, e.g. a
+# half-typed word from a search-as-you-type box. These are the fields the
+# old regex search matched on, so email and user_type still find users.
+USER_PREFIX_FIELDS = ("username", "skills", "interests", "user_type", "email", "biography")
+PROJECT_PREFIX_FIELDS = ("createdBy", "projectName", "tags", "projectDescription")
+
+
+def normalize_query(value):
+    # $text treats quotes and leading '-' as phrase/negation operators;
+    # search boxes should only ever match on plain terms.
+    return " ".join(re.findall(r"\w+", value or ""))
+
+
+def prefix_query(terms, fields):
+    # Every term has to start a word in at least one of the fields; arrays
+    # such as skills match if any element does.
+    clauses = []
+    for term in terms.split():
+        pattern = {"$regex": r"\b" + re.escape(term), "$options": "i"}
+        clauses.append({"$or": [{field: pattern} for field in fields]})
+    return {"$and": clauses}
+
+
+def text_search(collection, value, projection, prefix_fields=(), page=1, limit=SEARCH_PAGE_SIZE):
+    """Return one page of documents matching ``value``, best matches first.
+
+    Whole words go through the text index. If that matches nothing at all,
+    the terms are matched as word prefixes on ``prefix_fields`` instead, so
+    a partly typed word still finds something.
+    """
+    terms = normalize_query(value)
+    if not terms:
+        return []
+    skip = (page - 1) * limit
+    text_filter = {"$text": {"$search": terms}}
+    cursor = collection.find(text_filter, dict(projection, score={"$meta": "textScore"}))
+    results = list(cursor.sort([("score", {"$meta": "textScore"})]).skip(skip).limit(limit))
+    if results or not prefix_fields:
+        return results
+    if page > 1 and collection.find_one(text_filter, {"_id": 1}) is not None:
+        # The text index did match; this page is just past the last result.
+        return results
+    cursor = collection.find(prefix_query(terms, prefix_fields), projection)
+    return list(cursor.sort("_id", 1).skip(skip).limit(limit))
+
+
+def parse_page(value):
+    if value in (None, ''):
+        return 1
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("page must be an integer")
+    if page < 1:
+        raise ValueError("page must be positive")
+    return page
@@ -0,0 +1,148 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+
+SESSION_COOKIE_NAME = "silo_session"
+
+
+class MemorySessionStore:
+    """Bounded in-process session store.
+
+    Least recently used sessions are evicted once ``max_entries`` is reached,
+    and a background thread drops expired ones every ``purge_seconds``.
+    Each gunicorn worker has its own store, so a session lives in the worker
+    that created it; the API authenticates with JWTs and only needs sessions
+    for short-lived, per-worker state. Anything with the same get/set/delete
+    methods (a cachelib cache, say) can replace it.
+    """
+
+    def __init__(self, max_entries, purge_seconds):
+        self.max_entries = max_entries
+        self.purge_seconds = purge_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self._purger_pid = None
+
+    def get(self, sid):
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at <= time.time():
+                del self.entries[sid]
+                return None
+            self.entries.move_to_end(sid)
+            return data
+
+    def set(self, sid, data, expires_at):
+        self._start_purger()
+        with self.lock:
+            self.entries[sid] = (data, expires_at)
+            self.entries.move_to_end(sid)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self.lock:
+            self.entries.pop(sid, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self.lock:
+            expired = [sid for sid, (_, expires_at) in self.entries.items() if expires_at <= now]
+            for sid in expired:
+                del self.entries[sid]
+        return len(expired)
+
+    def _purge_forever(self):
+        while True:
+            time.sleep(self.purge_seconds)
+            self.purge_expired()
+
+    def _start_purger(self):
+        # Started with the first stored session, once per (forked) process.
+        if self._purger_pid != os.getpid():
+            self._purger_pid = os.getpid()
+            threading.Thread(target=self._purge_forever, name="session-purge", daemon=True).start()
+
+
+class LazySession(SessionMixin):
+    """Session that reads its store only when its contents are first used.
+
+    Requests that never touch ``session`` never reach the store, and
+    save_session skips them entirely.
+    """
+
+    def __init__(self, store, sid):
+        self.store = store
+        self.sid = sid
+        self._data = None
+        self.modified = False
+        self.accessed = False
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.accessed = True
+            stored = self.store.get(self.sid) if self.sid else None
+            if stored is None:
+                # Never adopt an id the store did not issue (session fixation).
+                self.sid = None
+            self._data = dict(stored or {})
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def clear(self):
+        self.data.clear()
+        self.modified = True
+
+
+class LazySessionInterface(SessionInterface):
+    """Server-side sessions keyed by a random cookie, with no I/O unless a session is used."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        return LazySession(self.store, request.cookies.get(SESSION_COOKIE_NAME))
+
+    def save_session(self, app, session, response):
+        if not session.modified:
+            return
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session.data:
+            if session.sid:
+                self.store.delete(session.sid)
+            response.delete_cookie(SESSION_COOKIE_NAME, domain=domain, path=path)
+            return
+        sid = session.sid or secrets.token_urlsafe(32)
+        expires = self.get_expiration_time(app, session)
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.store.set(sid, dict(session.data), expires.timestamp() if expires else time.time() + lifetime)
+        response.set_cookie(
+            SESSION_COOKIE_NAME, sid, expires=expires, domain=domain, path=path,
+            httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
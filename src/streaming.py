@@ -0,0 +1,113 @@
+import json
+from flask import Response, stream_with_context
+from flask import current_app as app
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(documents, transform=None, encode=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array one chunk at a time while reading ``documents`` lazily.
+
+    Only the current chunk is held in memory, so the response size no longer
+    bounds worker memory; the first chunk leaves as soon as it fills up.
+    """
+    encode = encode or app.json.dumps
+    buffer = ['[']
+    size = 1
+    first = True
+    for document in documents:
+        if transform is not None:
+            document = transform(document)
+        encoded = encode(document)
+        if not first:
+            buffer.append(',')
+            size += 1
+        buffer.append(encoded)
+        size += len(encoded)
+        first = False
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(']')
+    yield ''.join(buffer)
+
+
+def stream_json_array(documents, transform=None, encode=None, prefix='', suffix=None, status=200):
+    """Stream ``documents`` as a JSON array response.
+
+    ``prefix`` is written before the array and ``suffix`` (a callable) after
+    it, so an array can be wrapped in an object whose trailing keys are only
+    known once the documents have been read.
+    """
+    def generate():
+        if prefix:
+            yield prefix
+        yield from iter_json_array(documents, transform, encode)
+        if suffix is not None:
+            yield suffix()
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+
+class JSONArrayItemParser:
+    """Pull complete items out of a JSON array that arrives in pieces.
+
+    ``feed`` takes the next piece of text and returns the items (objects or
+    arrays) of the top-level array that it completed. Anything before the
+    opening bracket, such as a stray code fence, is skipped.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item = []
+        self.done = False
+
+    def feed(self, text):
+        items = []
+        for char in text:
+            if self.done:
+                break
+            if self.depth >= 2:
+                self.item.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.depth >= 1:
+                self.in_string = True
+            elif char in '[{' and (self.depth or char == '['):
+                if self.depth == 1:
+                    self.item = [char]
+                self.depth += 1
+            elif char in ']}' and self.depth:
+                self.depth -= 1
+                if self.depth == 1:
+                    items.append(json.loads(''.join(self.item)))
+                    self.item = []
+                elif self.depth == 0:
+                    self.done = True
+        return items
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event whose data is ``data`` encoded as JSON."""
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+def stream_events(events, status=200):
+    """Stream ``events`` ((name, data) pairs) as a text/event-stream response."""
+    def generate():
+        for event, data in events:
+            yield sse_event(event, data)
+
+    response = Response(stream_with_context(generate()), status=status, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from flask import current_app as app
+from . import mongo
+
+SUGGEST_LIMIT = 8
+SUGGEST_MAX_LIMIT = 25
+# Upper bound on index entries examined per lookup, so very short prefixes
+# ("a") stay as cheap as long ones.
+SUGGEST_SCAN_LIMIT = 200
+SUGGEST_TYPES = ('user', 'project', 'tag', 'skill', 'group')
+
+
+def normalize(text):
+    return " ".join(str(text).casefold().split())
+
+
+class PrefixIndex:
+    """Sorted-array prefix index for typeahead.
+
+    Every term is reachable from the start of each of its words, so "ros"
+    finds "Isabella Rossi". A term shared by many documents (a tag, a skill)
+    is stored once and ranked by how many documents carry it.
+    """
+
+    def __init__(self):
+        self._keys = []      # sorted (variant, type, term)
+        # (type, term) -> {"text": display text, "owners": set of owner keys,
+        #                  "count": len(owners), "owner": any one of them}
+        self._entries = {}
+        self._owned = {}     # (source, id) -> set of (type, term)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _variants(term):
+        words = term.split(" ")
+        return {" ".join(words[index:]) for index in range(len(words))}
+
+    def _add(self, owner, type_, text, keys):
+        term = normalize(text)
+        if not term:
+            return
+        entry = self._entries.get((type_, term))
+        if entry is None:
+            entry = self._entries[(type_, term)] = {"text": text, "owners": set(), "count": 0, "owner": owner}
+            for variant in self._variants(term):
+                keys.append((variant, type_, term))
+        entry["owners"].add(owner)
+        entry["count"] = len(entry["owners"])
+        self._owned.setdefault(owner, set()).add((type_, term))
+
+    def _remove(self, owner):
+        for type_, term in self._owned.pop(owner, ()):
+            entry = self._entries[(type_, term)]
+            entry["owners"].discard(owner)
+            entry["count"] = len(entry["owners"])
+            if entry["owner"] == owner and entry["owners"]:
+                entry["owner"] = next(iter(entry["owners"]))
+            if not entry["owners"]:
+                del self._entries[(type_, term)]
+                for variant in self._variants(term):
+                    key = (variant, type_, term)
+                    index = bisect.bisect_left(self._keys, key)
+                    if index < len(self._keys) and self._keys[index] == key:
+                        del self._keys[index]
+
+    def load(self, documents):
+        """Bulk-build from (owner, [(type, text), ...]) pairs with a single sort."""
+        keys = []
+        for owner, terms in documents:
+            for type_, text in terms:
+                self._add(owner, type_, text, keys)
+        keys.sort()
+        self._keys = keys
+
+    def set_document(self, owner, terms):
+        """Replace everything ``owner`` contributes; handles creates and renames."""
+        with self._lock:
+            self._remove(owner)
+            keys = []
+            for type_, text in terms:
+                self._add(owner, type_, text, keys)
+            for key in keys:
+                bisect.insort(self._keys, key)
+
+    def remove_document(self, owner):
+        with self._lock:
+            self._remove(owner)
+
+    def search(self, prefix, limit=SUGGEST_LIMIT, types=None):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            matches = {}
+            index = bisect.bisect_left(self._keys, (prefix,))
+            while index < len(self._keys) and len(matches) < SUGGEST_SCAN_LIMIT:
+                variant, type_, term = self._keys[index]
+                if not variant.startswith(prefix):
+                    break
+                if types is None or type_ in types:
+                    entry = self._entries[(type_, term)]
+                    # Only scalars are copied under the lock, however many owners a term has.
+                    matches[(type_, term)] = (type_, entry["text"], entry["count"], entry["owner"])
+                index += 1
+        ranked = sorted(matches.values(), key=lambda match: (-match[2], len(match[1]), match[1]))
+        suggestions = []
+        for type_, text, count, owner in ranked[:limit]:
+            suggestion = {"type": type_, "text": text, "count": count}
+            if type_ in ('user', 'project', 'group'):
+                suggestion["_id"] = str(owner[1])
+            suggestions.append(suggestion)
+        return suggestions
+
+
+def user_terms(user):
+    return [('user', user.get('username', ''))] + [('skill', skill) for skill in user.get('skills', []) or []]
+
+
+def project_terms(project):
+    return [('project', project.get('projectName', ''))] + [('tag', tag) for tag in project.get('tags', []) or []]
+
+
+def group_terms(group):
+    return [('group', group.get('groupName', ''))]
+
+
+def build_suggest_index(db):
+    index = PrefixIndex()
+    documents = []
+    for user in db.users.find({}, {"username": 1, "skills": 1}):
+        documents.append((('user', user['_id']), user_terms(user)))
+    for project in db.projects.find({}, {"projectName": 1, "tags": 1}):
+        documents.append((('project', project['_id']), project_terms(project)))
+    for group in db.groups.find({}, {"groupName": 1}):
+        documents.append((('group', group['_id']), group_terms(group)))
+    index.load(documents)
+    return index
+
+
+_index = None
+_built_at = 0.0
+_rebuild_lock = threading.Lock()
+
+
+def _rebuild(db):
+    global _index, _built_at
+    try:
+        _index = build_suggest_index(db)
+        _built_at = time.monotonic()
+    finally:
+        _rebuild_lock.release()
+
+
+def get_suggest_index():
+    """Return this worker's index, building it on first use.
+
+    Writes made through other workers are picked up by a periodic rebuild
+    (SUGGEST_REFRESH_SECONDS) that runs in the background while the current
+    index keeps serving.
+    """
+    if _index is None:
+        _rebuild_lock.acquire()
+        if _index is None:
+            _rebuild(mongo.db)
+        else:
+            _rebuild_lock.release()
+    elif time.monotonic() - _built_at > app.config['SUGGEST_REFRESH_SECONDS']:
+        if _rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=_rebuild, args=(mongo.db,), daemon=True).start()
+    return _index
+
+
+def index_user(user):
+    if _index is not None and user:
+        _index.set_document(('user', user['_id']), user_terms(user))
+
+
+def index_project(project):
+    if _index is not None and project:
+        _index.set_document(('project', project['_id']), project_terms(project))
+
+
+def index_group(group):
+    if _index is not None and group:
+        _index.set_document(('group', group['_id']), group_terms(group))
+
+
+def unindex_project(project_id):
+    if _index is not None:
+        _index.remove_document(('project', project_id))
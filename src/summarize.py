@@ -0,0 +1,304 @@
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app as app
+from .llm_client import get_llm_client, LLMUnavailable
+from .llm_cache import cached_completion, cache_key, cache_get, cache_set, is_cacheable
+from .streaming import JSONArrayItemParser
+from .chunking import estimate_tokens, split_text
+
+SIGN_PROMPT = "For the following resume, please write a concise (less than 100 words) bio for this person in the first person, also provide lists for suggested interests, suggested skills, a string for their latest university, a string for major, and a string for graduation year. If there are projects on the resume, also include the title of the project and its description. Please always format your response as a json with keys: bio, skills, interests, latestUniversity, major, grad_yr, projects (with contents title and desc). This is very important: the entirety of your response should constitute a valid JSON. There should be no json tags in the front or any leading/trailing text. Only give the json.  Here is the text:\n\n{text}"
+DESCRIPTION_TITLE_TAGS_PROMPT = "For the following file, please write a concise (less than 100 words) description for this project. Also, provide a list for suggested tags concerning general topics the file is about (tags like: machine learning, computer vision, NLP, robotics, genomics, etc). Lastly please provide a string name for this project. Please always format your response as a json with keys: name, tags, description. This is very important: the entirety of your response should constitute a valid JSON. There should be no json tags in the front or any leading/trailing text. Only give the json.  Here is the text:\n\n{text}"
+NOTES_PROMPT = "The following text is one excerpt of a longer document. Condense it into compact notes (at most 150 words) that keep every concrete fact: names, titles, dates, schools, degrees, skills, tools, results and project names. Only give the notes.  Here is the text:\n\n{text}"
+LAYERS_PROMPT = "I need to create a project page by summarizing the following text into multiple self-contained sections. Each section should be around 3 sentences. Make as many sections as necessary. These sections will explain the project in detail when viewed together. Please ensure that the entirety of your response is formatted as a valid JSON array with each paragraph as an object containing 'index' and 'content' keys. Do not include any additional text outside of the JSON array. There should be no json tags in the front or any leading/trailing text. Only give the json. THERE SHOULD BE NO: ```json in the response.   Here is the text:\n\n{text}"
+
+
+def chat_completion(prompt):
+    """Run one completion through the shared LLM client; returns (content, token usage)."""
+    return get_llm_client().complete(prompt)
+
+
+def summarize(template, text):
+    """Cached completion of ``template`` over ``text``; raises LLMError if the call fails."""
+    model = get_llm_client().model
+    return cached_completion(template, model, text, lambda: chat_completion(template.format(text=text)), RESPONSE_PARSERS.get(template))
+
+
+# Function to summarize text using OpenAI
+def summarize_text_for_sign(text):
+    print('Got to summarize text')
+    return summarize_long(SIGN_PROMPT, text)
+
+
+def summarize_text_description_title_tags(text):
+    print('Got to summarize_text_description_title_tags')
+    return summarize_long(DESCRIPTION_TITLE_TAGS_PROMPT, text)
+
+
+def summarize_text_layers(text):
+    print('Got to summarize_text_layers')
+    return summarize_layers_long(text)
+
+
+_pools = {}
+
+
+def get_llm_pool(name='llm'):
+    """Bounded pool for upstream LLM calls, created lazily in each worker process.
+
+    Chunk summaries use their own pool ('llm-chunks'): they are submitted from
+    tasks already running on the main pool, and sharing it could deadlock.
+    """
+    pool, pid = _pools.get(name, (None, None))
+    if pool is None or pid != os.getpid():
+        pool = ThreadPoolExecutor(max_workers=app.config['LLM_POOL_SIZE'], thread_name_prefix=name)
+        _pools[name] = (pool, os.getpid())
+    return pool
+
+
+def _run_in_app_context(flask_app, func, *args):
+    with flask_app.app_context():
+        return func(*args)
+
+
+def submit_llm_task(func, *args, pool_name='llm'):
+    """Run ``func(*args)`` on an LLM pool inside this app's context; returns its Future."""
+    return get_llm_pool(pool_name).submit(_run_in_app_context, app._get_current_object(), func, *args)
+
+
+def summarize_concurrently(tasks, timeout=None):
+    """Run independent summaries at the same time.
+
+    ``tasks`` maps a result name to (summarize function, text). Returns
+    (results, errors): every name is in ``results`` ("" if that call failed
+    or did not finish within ``timeout`` seconds) and failed names also get
+    an explanation in ``errors``, so callers can return partial results.
+    Raises LLMUnavailable when every task was turned away by the LLM client.
+    """
+    # Long inputs take a map round and a reduce call (see summarize_long).
+    timeout = 2 * app.config['LLM_TIMEOUT_SECONDS'] if timeout is None else timeout
+    flask_app = app._get_current_object()
+    pool = get_llm_pool()
+    futures = {name: pool.submit(_run_in_app_context, flask_app, func, text) for name, (func, text) in tasks.items()}
+    _, not_done = wait(futures.values(), timeout=timeout)
+
+    results, errors, unavailable = {}, {}, []
+    for name, future in futures.items():
+        results[name] = ""
+        if future in not_done:
+            future.cancel()
+            errors[name] = f"Timed out after {timeout}s"
+        elif future.exception() is not None:
+            errors[name] = str(future.exception())
+            if isinstance(future.exception(), LLMUnavailable):
+                unavailable.append(future.exception())
+        elif not future.result():
+            errors[name] = "Empty response from the language model"
+        else:
+            results[name] = future.result()
+    if unavailable and len(unavailable) == len(futures):
+        raise unavailable[0]
+    return results, errors
+
+
+def chunk_text(text):
+    """Split ``text`` into chunks of at most LLM_CHUNK_TOKENS each. Nothing is dropped."""
+    return split_text(text, app.config['LLM_CHUNK_TOKENS'])
+
+
+def _map_wave(template, chunks, timeout):
+    flask_app = app._get_current_object()
+    pool = get_llm_pool('llm-chunks')
+    futures = [pool.submit(_run_in_app_context, flask_app, summarize, template, chunk) for chunk in chunks]
+    _, not_done = wait(futures, timeout=timeout)
+    outputs, failures = [], []
+    for index, future in enumerate(futures):
+        if future in not_done:
+            future.cancel()
+            failures.append(TimeoutError(f"Chunk timed out after {timeout}s"))
+            outputs.append("")
+        elif future.exception() is not None:
+            failures.append(future.exception())
+            outputs.append("")
+        else:
+            outputs.append(future.result())
+    return outputs, failures
+
+
+def map_chunks(template, chunks, timeout=None):
+    """Summarize every chunk with ``template``; "" for chunks that failed or timed out.
+
+    Chunks run in waves of LLM_MAX_CHUNKS, each with its own timeout, so
+    one request never has more than that many calls in flight however long
+    its input. Raises the first chunk's error if no chunk succeeded.
+    """
+    timeout = app.config['LLM_TIMEOUT_SECONDS'] if timeout is None else timeout
+    wave_size = app.config['LLM_MAX_CHUNKS']
+    outputs, failures = [], []
+    for start in range(0, len(chunks), wave_size):
+        wave_outputs, wave_failures = _map_wave(template, chunks[start:start + wave_size], timeout)
+        outputs.extend(wave_outputs)
+        failures.extend(wave_failures)
+    for failure in failures:
+        print(f"Chunk summary failed: {failure}")
+    if failures and len(failures) == len(chunks):
+        raise failures[0]
+    return outputs
+
+
+def condense(text):
+    """Condense ``text`` into notes that fit one prompt.
+
+    Each round turns every chunk into notes of ~200 tokens; if the joined
+    notes still do not fit, they are condensed again.
+    """
+    while estimate_tokens(text) > app.config['LLM_CHUNK_TOKENS']:
+        notes = [note for note in map_chunks(NOTES_PROMPT, chunk_text(text)) if note]
+        if not notes:
+            return ""
+        condensed = "\n\n".join(notes)
+        if len(condensed) >= len(text):
+            raise RuntimeError("Condensing did not shorten the text")
+        text = condensed
+    return text
+
+
+def summarize_long(template, text):
+    """Map-reduce ``template`` over text that does not fit one prompt.
+
+    Short input goes straight to ``template``. Longer input is condensed to
+    notes, chunk by chunk in parallel and again over the notes until they
+    fit, and the notes are summarized with ``template``. Typical files need
+    one condensing round, so two rounds of LLM latency in all.
+    """
+    if estimate_tokens(text) <= app.config['LLM_CHUNK_TOKENS']:
+        return summarize(template, text)
+    notes = condense(text)
+    if not notes:
+        return ""
+    return summarize(template, notes)
+
+
+def parse_layers(content):
+    """Parse one LAYERS_PROMPT response into its list of section texts."""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+    layers = json.loads(content)
+    if not isinstance(layers, list):
+        raise ValueError("Expected a JSON array of layers")
+    return [layer["content"] for layer in layers if isinstance(layer, dict) and layer.get("content")]
+
+
+# Responses to these prompts are only cached once they parse.
+RESPONSE_PARSERS = {
+    SIGN_PROMPT: json.loads,
+    DESCRIPTION_TITLE_TAGS_PROMPT: json.loads,
+    LAYERS_PROMPT: parse_layers,
+}
+
+
+def summarize_layers_long(text):
+    """Summarize each chunk into layers in parallel and merge them, in order, into one array."""
+    if estimate_tokens(text) <= app.config['LLM_CHUNK_TOKENS']:
+        return summarize(LAYERS_PROMPT, text)
+    contents = []
+    for index, output in enumerate(map_chunks(LAYERS_PROMPT, chunk_text(text))):
+        if not output:
+            continue
+        try:
+            contents.extend(parse_layers(output))
+        except (ValueError, KeyError) as e:
+            print(f"Skipping unparseable layers for chunk {index}: {e}")
+    if not contents:
+        return ""
+    return json.dumps([{"index": index, "content": content} for index, content in enumerate(contents)])
+
+
+def _stream_chunk_layers(text):
+    """Yield each layer's content from one streamed LAYERS_PROMPT completion as soon as it parses.
+
+    A cached response is replayed at once; a fresh one is cached when complete and parseable.
+    """
+    client = get_llm_client()
+    key = cache_key(LAYERS_PROMPT, client.model, text)
+    try:
+        cached = cache_get(key)
+    except Exception as e:
+        print(f"Error reading LLM cache: {e}")
+        cached = None
+    if cached:
+        yield from parse_layers(cached)
+        return
+
+    parser = JSONArrayItemParser()
+    received = []
+    start = time.monotonic()
+    for delta in client.stream(LAYERS_PROMPT.format(text=text)):
+        received.append(delta)
+        for layer in parser.feed(delta):
+            if isinstance(layer, dict) and layer.get("content"):
+                yield layer["content"]
+    content = "".join(received).strip()
+    if content and is_cacheable(content, parse_layers):
+        try:
+            cache_set(key, content, int((time.monotonic() - start) * 1000), estimate_tokens(text) + estimate_tokens(content))
+        except Exception as e:
+            print(f"Error writing LLM cache: {e}")
+
+
+def _produce_chunk_layers(chunk, layers):
+    try:
+        for content in _stream_chunk_layers(chunk):
+            layers.put(("layer", content))
+        layers.put(("end", None))
+    except Exception as e:
+        layers.put(("error", e))
+
+
+def stream_text_layers(text):
+    """Yield {'index', 'content'} layers as they are generated, numbered in document order.
+
+    Long input is chunked as in summarize_layers_long and every chunk streams
+    in parallel; later chunks are buffered until the earlier ones finish.
+    A chunk that fails or stalls for LLM_TIMEOUT_SECONDS is skipped; if no
+    layer was produced at all, its error is raised.
+    """
+    if estimate_tokens(text) <= app.config['LLM_CHUNK_TOKENS']:
+        for index, content in enumerate(_stream_chunk_layers(text)):
+            yield {"index": index, "content": content}
+        return
+
+    chunks = chunk_text(text)
+    outputs = []
+
+    def submit_through(last):
+        # Keep at most LLM_MAX_CHUNKS chunks ahead of the one being yielded.
+        while len(outputs) < min(last + 1, len(chunks)):
+            layers = queue.Queue()
+            submit_llm_task(_produce_chunk_layers, chunks[len(outputs)], layers, pool_name='llm-chunks')
+            outputs.append(layers)
+
+    index, failures = 0, []
+    for chunk_index in range(len(chunks)):
+        submit_through(chunk_index + app.config['LLM_MAX_CHUNKS'] - 1)
+        layers = outputs[chunk_index]
+        while True:
+            try:
+                kind, value = layers.get(timeout=app.config['LLM_TIMEOUT_SECONDS'])
+            except queue.Empty:
+                failures.append(TimeoutError(f"Chunk {chunk_index} stalled"))
+                break
+            if kind == "layer":
+                yield {"index": index, "content": value}
+                index += 1
+                continue
+            if kind == "error":
+                failures.append(value)
+            break
+    for failure in failures:
+        print(f"Chunk layers failed: {failure}")
+    if failures and index == 0:
+        raise failures[0]
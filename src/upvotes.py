@@ -0,0 +1,111 @@
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from .ranking import refresh_hot_score
+
+
+class UpvoteTargetNotFound(LookupError):
+    pass
+
+
+def _upvotes_update(upvote_id, add):
+    """Update pipeline adding or removing ``upvote_id`` and setting upvote_count from the array.
+
+    Counting the array instead of $inc-ing the counter keeps documents
+    written before the counter existed, or left with a wrong one, correct.
+    """
+    upvotes = {"$ifNull": ["$upvotes", []]}
+    if add:
+        upvotes = {"$cond": [{"$in": [upvote_id, upvotes]}, upvotes, {"$concatArrays": [upvotes, [upvote_id]]}]}
+    else:
+        upvotes = {"$filter": {"input": upvotes, "cond": {"$ne": ["$$this", upvote_id]}}}
+    return [
+        {"$set": {"upvotes": upvotes}},
+        {"$set": {"upvote_count": {"$size": "$upvotes"}}},
+    ]
+
+
+def _apply(db, session, upvote_id, user_id, project_id, add):
+    project = db.projects.update_one({"_id": project_id}, _upvotes_update(upvote_id, add), session=session)
+    if project.matched_count == 0:
+        raise UpvoteTargetNotFound("Project not found")
+    refresh_hot_score(db, project_id, session=session)
+    user = db.users.update_one({"_id": user_id}, _upvotes_update(upvote_id, add), session=session)
+    if user.matched_count == 0:
+        raise UpvoteTargetNotFound("User not found")
+
+
+def add_upvote(client, db, user_id, project_id, author):
+    """Record an upvote and bump both counters in one transaction.
+
+    Returns (upvote, created). The unique (user_id, project_id) index makes
+    a repeated vote a no-op that returns the existing upvote.
+    """
+    upvote = {
+        "_id": ObjectId(),
+        "project_id": project_id,
+        "user_id": user_id,
+        "author": author,
+    }
+
+    def record(session):
+        db.upvotes.insert_one(upvote, session=session)
+        _apply(db, session, upvote["_id"], user_id, project_id, True)
+
+    try:
+        with client.start_session() as session:
+            session.with_transaction(record)
+    except DuplicateKeyError:
+        return db.upvotes.find_one({"user_id": user_id, "project_id": project_id}), False
+    return upvote, True
+
+
+def remove_upvote(client, db, user_id, project_id):
+    """Withdraw an upvote and decrement both counters in one transaction.
+
+    Returns the removed upvote, or None if the user had not upvoted.
+    """
+    removed = {}
+
+    def withdraw(session):
+        removed.clear()
+        upvote = db.upvotes.find_one_and_delete({"user_id": user_id, "project_id": project_id}, session=session)
+        if upvote:
+            _apply(db, session, upvote["_id"], user_id, project_id, False)
+            removed.update(upvote)
+
+    with client.start_session() as session:
+        session.with_transaction(withdraw)
+    return removed or None
+
+
+def recount_upvotes(db, only_missing=False):
+    """Rebuild upvote_count from the upvotes arrays (for documents written before the counters)."""
+    query = {"upvote_count": {"$exists": False}} if only_missing else {}
+    count_stage = [{"$set": {"upvote_count": {"$size": {"$ifNull": ["$upvotes", []]}}}}]
+    db.projects.update_many(query, count_stage)
+    db.users.update_many(query, count_stage)
+
+
+def dedupe_upvotes(db):
+    """Delete repeated upvotes of one project by one user, keeping the oldest; returns how many went.
+
+    Older code allowed them, and the unique upvote_once index cannot be
+    built while they exist. The removed ids are pulled from the projects'
+    and users' upvotes arrays and those counters recounted.
+    """
+    duplicates = db.upvotes.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": {"user_id": "$user_id", "project_id": "$project_id"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    removed = [upvote_id for group in duplicates for upvote_id in group["ids"][1:]]
+    if not removed:
+        return 0
+    db.upvotes.delete_many({"_id": {"$in": removed}})
+    count_stage = {"$set": {"upvote_count": {"$size": {"$ifNull": ["$upvotes", []]}}}}
+    for collection in (db.projects, db.users):
+        collection.update_many(
+            {"upvotes": {"$in": removed}},
+            [{"$set": {"upvotes": {"$filter": {"input": "$upvotes", "cond": {"$not": [{"$in": ["$$this", removed]}]}}}}}, count_stage],
+        )
+    return len(removed)